@@ -0,0 +1,40 @@
+"""add user search indexes
+
+Revision ID: 9b2e4d61c0a7
+Revises: 3c1f9a7d2b64
+Create Date: 2026-10-16 22:05:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2e4d61c0a7'
+down_revision: Union[str, None] = '3c1f9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('nickname', 'email', 'first_name', 'last_name')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Built concurrently so a large users table stays writable during the migration
+    with op.get_context().autocommit_block():
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(f'ix_users_{column}_trgm', 'users', [column], unique=False, postgresql_using='gin',
+                            postgresql_ops={column: 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_users_role_created_at_id', 'users', ['role', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_locked_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                        postgresql_where=sa.text('is_locked'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_locked_created_at_id', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_role_created_at_id', table_name='users', postgresql_concurrently=True)
+        for column in reversed(TRIGRAM_COLUMNS):
+            op.drop_index(f'ix_users_{column}_trgm', table_name='users', postgresql_concurrently=True)
@@ -1,20 +1,237 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from typing import List, Optional
+
+from sqlalchemy import event, exc, make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait and how many of them time out."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+        self.stats["checkouts"] += 1
+        return connection
+
+    def metrics(self) -> dict:
+        checkouts = self.stats["checkouts"]
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": checkouts,
+            "checkout_timeouts": self.stats["timeouts"],
+            "wait_ms_avg": round(self.stats["wait_seconds_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_ms_max": round(self.stats["wait_seconds_max"] * 1000, 3),
+        }
+
+def create_engine(database_url: str, echo: bool = False, pool_size: int = 5, max_overflow: int = 10,
+                  pool_timeout: float = 30, pool_recycle: int = -1, pool_pre_ping: bool = False,
+                  statement_cache_size: int = 100, transaction_pooler: bool = False):
+    """
+    Create an async engine backed by an `InstrumentedPool`.
+
+    With asyncpg, `statement_cache_size` is the number of prepared statements kept per
+    connection. `transaction_pooler` is for pgbouncer-style transaction pooling, where a
+    connection may change between transactions: prepared statements are then never reused
+    and get unique names so they cannot clash on a shared server connection.
+    """
+    connect_args = {}
+    if make_url(database_url).get_driver_name() == "asyncpg":
+        if transaction_pooler:
+            connect_args = {
+                "prepared_statement_cache_size": 0,
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        else:
+            connect_args = {"prepared_statement_cache_size": statement_cache_size, "statement_cache_size": statement_cache_size}
+    return create_async_engine(
+        database_url,
+        echo=echo,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+class ReplicaSet:
+    """
+    Read replicas handed out round-robin, skipping replicas whose last health check or
+    connection attempt failed.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], health_interval: float = 5.0, health_timeout: float = 2.0):
+        self.engines = engines
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.healthy = [True] * len(engines)
+        self._counter = itertools.count()
+        self._health_task: Optional[asyncio.Task] = None
+        for index, engine in enumerate(engines):
+            event.listen(engine.sync_engine, "handle_error", self._on_error(index))
+
+    def _on_error(self, index: int):
+        def handle_error(context):
+            if context.is_disconnect:
+                self.mark(index, False)
+        return handle_error
+
+    def mark(self, index: int, healthy: bool):
+        if self.healthy[index] != healthy:
+            url = self.engines[index].url.render_as_string(hide_password=True)
+            logger.warning(f"Read replica {url} is now {'healthy' if healthy else 'unhealthy'}.")
+        self.healthy[index] = healthy
+
+    def next_engine(self) -> Optional[AsyncEngine]:
+        """Next healthy replica in round-robin order, or None if every replica is down."""
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self.healthy[index]:
+                return self.engines[index]
+        return None
+
+    async def check_health(self):
+        """Ping every replica at once; one that does not answer within `health_timeout` is unhealthy."""
+        await asyncio.gather(*(self._check(index, engine) for index, engine in enumerate(self.engines)))
+
+    async def _check(self, index: int, engine: AsyncEngine):
+        try:
+            await asyncio.wait_for(self._ping(engine), self.health_timeout)
+            self.mark(index, True)
+        except Exception as e:
+            logger.debug(f"Replica health check failed: {e!r}")
+            self.mark(index, False)
+
+    @staticmethod
+    async def _ping(engine: AsyncEngine):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def _run_health_checks(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def start(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.get_running_loop().create_task(self._run_health_checks())
+
+    async def dispose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    def metrics(self) -> List[dict]:
+        return [
+            {"url": engine.url.render_as_string(hide_password=True), "healthy": healthy, **engine.pool.metrics()}
+            for engine, healthy in zip(self.engines, self.healthy)
+        ]
+
+class RoutingSession(Session):
+    """
+    Sessions from the read-only factory (`info["read_only"]`) read from a replica, keeping
+    the one they were first given; without a healthy replica, or when pinned to the primary
+    (`info["primary"]`, for a client that has just written), they use the primary in READ
+    ONLY transactions. Every other session uses the primary only, so request handlers that
+    may write (logins, verification, upgrades) never decide on rows a replica has not caught
+    up with yet.
+
+    A session that commits after writing sets `committed_write` on the request state in
+    `info["request_state"]`, if there is one; see `ReadYourWritesMiddleware`.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get("read_only"):
+            if self.info.get("primary"):
+                return Database._read_only_engine.sync_engine
+            return self._replica_or(Database._read_only_engine.sync_engine)
+        return Database._engine.sync_engine
+
+    def _replica_or(self, fallback):
+        if "replica" not in self.info:
+            replica = Database._replicas.next_engine() if Database._replicas is not None else None
+            self.info["replica"] = replica.sync_engine if replica is not None else fallback
+        return self.info["replica"]
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _note_write(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+@event.listens_for(RoutingSession, "after_commit")
+def _note_committed_write(session):
+    if session.info.pop("wrote", False) and session.info.get("request_state") is not None:
+        session.info["request_state"].committed_write = True
 
 class Database:
     """Handles database connections and sessions."""
     _engine = None
+    _read_only_engine = None
+    _replicas: Optional[ReplicaSet] = None
     _session_factory = None
+    _read_only_session_factory = None
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+    def initialize(cls, database_url: str, echo: bool = False, replica_urls: List[str] = (), replica_health_interval: float = 5.0,
+                   replica_health_timeout: float = 2.0, **pool_options):
+        """
+        Initialize the primary engine, one engine per read replica, and the sessionmaker.
+        `pool_options` are passed to `create_engine` for every engine.
+        """
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            cls._engine = create_engine(database_url, echo=echo, **pool_options)
+            if replica_urls:
+                cls._replicas = ReplicaSet(
+                    [create_engine(url, echo=echo, **pool_options) for url in replica_urls],
+                    health_interval=replica_health_interval,
+                    health_timeout=replica_health_timeout,
+                )
+            # Same pool; connections checked out through it run BEGIN READ ONLY
+            cls._read_only_engine = cls._engine.execution_options(postgresql_readonly=True)
             cls._session_factory = sessionmaker(
-                bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
+                bind=cls._engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False, future=True
+            )
+            cls._read_only_session_factory = sessionmaker(
+                bind=cls._read_only_engine, class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False,
+                future=True, info={"read_only": True},
             )
 
     @classmethod
@@ -23,3 +240,32 @@ class Database:
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
         return cls._session_factory
+
+    @classmethod
+    def get_read_only_session_factory(cls):
+        """Session factory for requests that only read; their transactions are READ ONLY and never commit."""
+        if cls._read_only_session_factory is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        return cls._read_only_session_factory
+
+    @classmethod
+    def start_replica_health_checks(cls):
+        if cls._replicas is not None:
+            cls._replicas.start()
+
+    @classmethod
+    async def dispose(cls):
+        if cls._replicas is not None:
+            await cls._replicas.dispose()
+        if cls._engine is not None:
+            await cls._engine.dispose()
+
+    @classmethod
+    def pool_metrics(cls) -> dict:
+        """Live state of the primary and replica connection pools, or an empty dict before initialization."""
+        if cls._engine is None:
+            return {}
+        return {
+            "primary": cls._engine.pool.metrics(),
+            "replicas": cls._replicas.metrics() if cls._replicas is not None else [],
+        }
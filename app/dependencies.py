@@ -1,11 +1,12 @@
 from builtins import Exception, dict, str
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import Database
+from app.middleware.read_your_writes import reads_primary
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
-from app.services.jwt_service import decode_token
+from app.services.jwt_service import decode_token_cached
 from settings.config import Settings
 from fastapi import Depends
 
@@ -17,16 +18,34 @@ def get_email_service() -> EmailService:
     template_manager = TemplateManager()
     return EmailService(template_manager=template_manager)
 
-async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
+async def get_db(request: Request) -> AsyncSession:
+    """
+    Dependency that provides a database session for each request. Committing a write marks
+    the request, so its client reads from the primary for a while (see ReadYourWritesMiddleware).
+    """
     async_session_factory = Database.get_session_factory()
-    async with async_session_factory() as session:
+    async with async_session_factory(info={"request_state": request.state}) as session:
         try:
             yield session
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
         
 
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Dependency for routes that only read. The session runs in a READ ONLY transaction (on a
+    replica when there is one, unless the client wrote moments ago) and is never committed,
+    only closed.
+    """
+    async_session_factory = Database.get_read_only_session_factory()
+    primary = reads_primary(request.headers.get("cookie", ""))
+    async with async_session_factory(info={"primary": True} if primary else {}) as session:
+        try:
+            yield session
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
@@ -35,7 +54,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     if payload is None:
         raise credentials_exception
     user_id: str = payload.get("sub")
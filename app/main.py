@@ -3,8 +3,14 @@ from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware  # Import the CORSMiddleware
 from app.database import Database
+from app.middleware.rate_limit import RateLimitMiddleware, rate_limiter
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
 from app.dependencies import get_settings
-from app.routers import user_routes
+from app.routers import jwks_routes, metrics_routes, user_routes
+from app.services.hashing_service import HashingQueueFullError, get_hashing_service
+from app.services.login_activity_buffer import login_activity_buffer
+from app.services.user_cache import user_cache
+from app.services.user_service import registration_group_commit
 from app.utils.api_description import getDescription
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.openapi.utils import get_openapi
@@ -22,6 +28,12 @@ app = FastAPI(
 )
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Token-bucket rate limits for login, registration and write endpoints (see settings.rate_limit_rules)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, max_login_body=get_settings().rate_limit_max_login_body)
+
+# Reads right after a client's own write go to the primary (see settings.db_read_your_writes_window)
+app.add_middleware(ReadYourWritesMiddleware, window=get_settings().db_read_your_writes_window)
+
 # CORS middleware configuration
 # This middleware will enable CORS and allow requests from any origin
 # It can be configured to allow specific methods, headers, and origins
@@ -36,13 +48,43 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(
+        settings.database_url,
+        settings.debug,
+        replica_urls=[url.strip() for url in settings.database_replica_urls.split(",") if url.strip()],
+        replica_health_interval=settings.db_replica_health_interval,
+        replica_health_timeout=settings.db_replica_health_timeout,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        statement_cache_size=settings.db_statement_cache_size,
+        transaction_pooler=settings.db_transaction_pooler,
+    )
+    Database.start_replica_health_checks()
+    login_activity_buffer.start()
+    user_cache.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await registration_group_commit.stop()
+    await user_cache.stop()
+    await login_activity_buffer.stop()
+    get_hashing_service().shutdown()
+    await Database.dispose()
+
+@app.exception_handler(HashingQueueFullError)
+async def hashing_queue_full_handler(request, exc):
+    return JSONResponse(status_code=503, content={"message": "Server is busy, please retry shortly."}, headers={"Retry-After": "1"})
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
     return JSONResponse(status_code=500, content={"message": "An unexpected error occurred."})
 
 app.include_router(user_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(jwks_routes.router)
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
@@ -0,0 +1,252 @@
+# app/middleware/rate_limit.py
+from builtins import Exception, bool, dict, float, int, list, str
+import json
+import math
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.services.jwt_service import decode_token_cached
+from settings.config import settings
+
+logger = getLogger(__name__)
+
+
+class RateLimitRule:
+    """
+    A token bucket applied to requests matching `method` and `path`. A path ending
+    in `*` matches by prefix; paths in `exclude` are skipped (e.g. a read-only POST under a
+    write prefix). `scope` is either "ip" (one bucket per client address) or "account"
+    (one bucket per login username or token subject).
+    """
+
+    def __init__(self, method: str, path: str, scope: str, capacity: int, per_seconds: float, exclude: List[str] = ()):
+        if scope not in ("ip", "account"):
+            raise ValueError(f"Unknown rate limit scope: {scope}")
+        self.method = method.upper()
+        self.path = path
+        self.exclude = set(exclude)
+        self.scope = scope
+        self.capacity = capacity
+        self.refill_rate = capacity / per_seconds
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method or path in self.exclude:
+            return False
+        if self.path.endswith("*"):
+            return path.startswith(self.path[:-1])
+        return path == self.path
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path} {self.scope}"
+
+
+class MemoryBackend:
+    """Token buckets held in this process, bounded to the `max_keys` most recently used."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, capacity: int, refill_rate: float) -> float:
+        """Take one token; returns 0 if allowed, otherwise the seconds until a token is available."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / refill_rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self):
+        self._buckets.clear()
+
+
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared by every worker through Redis, updated atomically by a Lua script."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        # Imported here so the redis package is only needed when a shared backend is configured.
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_LUA)
+
+    async def consume(self, key: str, capacity: int, refill_rate: float) -> float:
+        return float(await self._script(keys=[self.prefix + key], args=[capacity, refill_rate, time.time()]))
+
+    def reset(self):
+        pass
+
+
+class RateLimiter:
+    """Applies the configured rules to a request and keeps allow/limit counters per rule."""
+
+    def __init__(self, rules: List[RateLimitRule], backend, trust_proxy_headers: bool = False):
+        self.rules = rules
+        self.backend = backend
+        self.trust_proxy_headers = trust_proxy_headers
+        self.methods = {rule.method for rule in rules}
+        self._stats: Dict[str, Dict[str, int]] = {rule.name: {"allowed": 0, "limited": 0} for rule in rules}
+
+    def matching_rules(self, method: str, path: str) -> List[RateLimitRule]:
+        if method not in self.methods:
+            return []
+        return [rule for rule in self.rules if rule.matches(method, path)]
+
+    def client_ip(self, scope) -> str:
+        if self.trust_proxy_headers:
+            for name, value in scope["headers"]:
+                if name == b"x-real-ip":
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def check(self, rule: RateLimitRule, identity: str) -> float:
+        try:
+            wait = await self.backend.consume(f"{rule.name}:{identity}", rule.capacity, rule.refill_rate)
+        except Exception as e:
+            # Fail open: an unavailable shared backend must not take the API down with it.
+            logger.error("Rate limit backend error: %s", e)
+            return 0.0
+        self._stats[rule.name]["limited" if wait else "allowed"] += 1
+        return wait
+
+    def reset(self):
+        self.backend.reset()
+
+    def metrics(self) -> dict:
+        return {"backend": type(self.backend).__name__, "rules": self._stats}
+
+
+def _token_subject(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = decode_token_cached(token)
+                return payload.get("sub") if payload else None
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-IP and per-account token buckets. Requests that match
+    no rule are passed straight through. Rejected requests get a 429 with Retry-After.
+    A login body is read at most `max_login_body` bytes to find the account; larger ones
+    get a 413 before anything else reads them.
+    """
+
+    def __init__(self, app, limiter: "RateLimiter", max_login_body: int = 65536):
+        self.app = app
+        self.limiter = limiter
+        self.max_login_body = max_login_body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rules = self.limiter.matching_rules(scope["method"], scope["path"])
+        if not rules:
+            return await self.app(scope, receive, send)
+
+        account = None
+        if any(rule.scope == "account" for rule in rules):
+            account = _token_subject(scope)
+            if account is None and scope["path"] == "/login/":
+                # The account of a login is the form username; buffer the body so the route can still read it.
+                body, receive = await _buffer_body(receive, self.max_login_body)
+                if body is None:
+                    return await _error_response(send, 413, "Request body too large.")
+                account = parse_qs(body.decode("latin-1")).get("username", [None])[0]
+
+        wait = 0.0
+        for rule in rules:
+            identity = self.limiter.client_ip(scope) if rule.scope == "ip" else account
+            if identity is None:
+                continue
+            wait = max(wait, await self.limiter.check(rule, identity.lower()))
+        if wait:
+            return await _too_many_requests(send, wait)
+        return await self.app(scope, receive, send)
+
+
+async def _buffer_body(receive, max_size: int):
+    """Read the whole body, or give up with (None, receive) once it is larger than `max_size` bytes."""
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        size += len(chunks[-1])
+        if size > max_size:
+            return None, receive
+        more_body = message.get("more_body", False)
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay
+
+
+async def _too_many_requests(send, wait: float):
+    await _error_response(send, 429, "Too many requests, please retry later.", [(b"retry-after", str(max(1, math.ceil(wait))).encode())])
+
+
+async def _error_response(send, status: int, detail: str, headers: List[Tuple[bytes, bytes]] = ()):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def build_rate_limiter() -> RateLimiter:
+    rules = [RateLimitRule(**rule) for rule in json.loads(settings.rate_limit_rules)] if settings.rate_limit_enabled else []
+    backend = RedisBackend(settings.rate_limit_redis_url) if settings.rate_limit_redis_url else MemoryBackend()
+    return RateLimiter(rules, backend, trust_proxy_headers=settings.rate_limit_trust_proxy_headers)
+
+
+rate_limiter = build_rate_limiter()
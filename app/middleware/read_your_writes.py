@@ -0,0 +1,47 @@
+# app/middleware/read_your_writes.py
+from builtins import float, str
+import math
+import time
+from http.cookies import CookieError, SimpleCookie
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def reads_primary(cookie_header: str) -> bool:
+    """Whether a request with this Cookie header is still inside its read-your-writes window."""
+    cookie = SimpleCookie()
+    try:
+        cookie.load(cookie_header)
+        return float(cookie[READ_PRIMARY_COOKIE].value) > time.time()
+    except (CookieError, KeyError, ValueError):
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that pins a client's reads to the primary for `window` seconds after it
+    committed a write, so a GET right after a PUT or DELETE never sees a replica that has not
+    replayed it yet.
+
+    `get_db` hands the request state to its session, which sets `committed_write` on it when it
+    commits a write; the response then carries a cookie holding the end of the window, and
+    `get_read_db` pins the read-only sessions of requests that send it back to the primary.
+    Clients that drop cookies just read from replicas as before.
+    """
+
+    def __init__(self, app, window: float):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.window <= 0:
+            return await self.app(scope, receive, send)
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and state.get("committed_write"):
+                cookie = f"{READ_PRIMARY_COOKIE}={time.time() + self.window:.3f}; Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
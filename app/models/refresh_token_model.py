@@ -0,0 +1,35 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class RefreshToken(Base):
+    """
+    A refresh token issued at login, corresponding to the 'refresh_tokens' table in the database.
+    Only the SHA-256 digest of the token is stored. Each refresh revokes the presented token and
+    issues a new one in the same family; presenting a revoked token again revokes the whole family.
+
+    Attributes:
+        id (UUID): Unique identifier for the token.
+        user_id (UUID): The user the token was issued to.
+        family_id (UUID): Identifier shared by every token rotated from the same login.
+        token_hash (str): Hex SHA-256 digest of the token, unique.
+        expires_at (datetime): Time after which the token can no longer be used.
+        revoked_at (datetime): Time the token was rotated or revoked, if it has been.
+        created_at (datetime): Timestamp when the token was issued, set by the server.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=False, index=True)
+    token_hash: Mapped[str] = Column(String(64), unique=True, nullable=False, index=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken user={self.user_id}, family={self.family_id}>"
@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    DDL, Column, String, Integer, DateTime, Boolean, Index, event, func, text, Enum as SQLAlchemyEnum
 )
 from sqlalchemy.dialects.postgresql import UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
@@ -52,6 +52,15 @@ class User(Base):
     """
     __tablename__ = "users"
     __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Backs keyset pagination over (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Search: trigram indexes serve ILIKE '%q%', the B-tree ones the role and locked filters in page order
+        *(Index(f"ix_users_{name}_trgm", name, postgresql_using="gin", postgresql_ops={name: "gin_trgm_ops"})
+          for name in ("nickname", "email", "first_name", "last_name")),
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+        Index("ix_users_locked_created_at_id", "created_at", "id", postgresql_where=text("is_locked")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     nickname: Mapped[str] = Column(String(50), unique=True, nullable=False, index=True)
@@ -95,3 +104,6 @@ class User(Base):
         """Updates the professional status and logs the update time."""
         self.is_professional = status
         self.professional_status_updated_at = func.now()
+
+# The trigram indexes need pg_trgm; migrations create it too, this covers metadata.create_all
+event.listen(User.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+
+from app.services.jwt_keys import get_key_ring
+
+router = APIRouter()
+
+
+@router.get("/.well-known/jwks.json", tags=["Login and Registration"])
+async def jwks(response: Response):
+    """Public keys that downstream services can use to verify our access tokens locally."""
+    key_ring = get_key_ring()
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_ring.jwks() if key_ring else {"keys": []}
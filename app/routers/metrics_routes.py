@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+
+from app.database import Database
+from app.dependencies import require_role
+from app.middleware.rate_limit import rate_limiter
+from app.services.hashing_service import get_hashing_service
+from app.services.jwt_service import verified_token_cache
+from app.services.login_activity_buffer import login_activity_buffer
+from app.services.user_cache import user_cache
+from app.services.user_service import registration_group_commit, user_count_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics/", tags=["Monitoring"])
+async def get_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """Runtime metrics for the subsystems that shape request latency."""
+    return {
+        "db_pool": Database.pool_metrics(),
+        "password_hashing": get_hashing_service().metrics(),
+        "jwt_cache": verified_token_cache.metrics(),
+        "login_write_behind": login_activity_buffer.metrics(),
+        "rate_limits": rate_limiter.metrics(),
+        "registration_group_commit": registration_group_commit.metrics(),
+        "user_count_cache": user_count_cache.metrics(),
+        "user_cache": user_cache.metrics(),
+    }
@@ -1,32 +1,103 @@
-from datetime import timedelta
+import json
+from datetime import datetime, timedelta
+from typing import Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db, get_email_service, require_role, get_settings
+from app.dependencies import get_db, get_email_service, get_read_db, require_role, get_settings
 from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
-from app.schemas.user_schemas import UserCreate, UserUpdate, UserListResponse, UserResponse
-from app.services.user_service import UserService
+from app.schemas.token_schema import RefreshTokenRequest, TokenResponse
+from app.schemas.user_schemas import UserBatchLookupRequest, UserBatchLookupResponse, UserBulkAction, UserBulkRequest, UserBulkResponse, UserBulkResult, UserCreate, UserUpdate, UserListResponse, UserResponse, UserSearchResponse
+from app.database import Database
+from app.models.user_model import UserRole
+from app.services.user_service import EXPORTABLE_COLUMNS, CountMode, LoginOutcome, RegistrationOutcome, UniqueFieldTakenError, UserService
+from app.services.user_import_service import UserImportService
+from app.services.refresh_token_service import RefreshTokenService
 from app.services.jwt_service import create_access_token
 from app.services.email_service import EmailService
 from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.utils.record_stream import iter_csv_lines, iter_csv_records, iter_file_chunks, iter_ndjson_lines, iter_ndjson_records, spool
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
 
 
+# Declared before /users/{user_id} so "search" and "export" are not parsed as user ids
+@router.get("/users/search", response_model=UserSearchResponse, tags=["User Management"])
+async def search_users(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=3, description="Substring of nickname, email, first or last name"),
+    role: Optional[UserRole] = None,
+    is_locked: Optional[bool] = None,
+    email_verified: Optional[bool] = None,
+    is_professional: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="Opaque cursor taken from a next or prev link"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
+):
+    conditions = UserService.search_conditions(
+        q, role=role, is_locked=is_locked, email_verified=email_verified, is_professional=is_professional,
+        created_after=created_after, created_before=created_before,
+    )
+    try:
+        users, has_next, has_prev = await UserService.list_users_page(db, limit, cursor, conditions)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return UserSearchResponse(
+        items=[UserResponse.model_validate(u) for u in users],
+        size=len(users),
+        links=generate_pagination_links(request, users, limit, has_next, has_prev)
+    )
+
+
+@router.get("/users/export", tags=["User Management"])
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    columns: Optional[str] = Query(None, description="Comma separated columns, all exportable columns by default"),
+    role: Optional[UserRole] = None,
+    is_locked: Optional[bool] = None,
+    email_verified: Optional[bool] = None,
+    is_professional: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    current_user: dict = Depends(require_role(["ADMIN"]))
+):
+    """Stream every matching user as NDJSON or CSV, read through a server-side cursor."""
+    names = [name.strip() for name in columns.split(",") if name.strip()] if columns else list(EXPORTABLE_COLUMNS)
+    unknown = [name for name in names if name not in EXPORTABLE_COLUMNS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}" if unknown else "No columns selected")
+    filters = dict(role=role, is_locked=is_locked, email_verified=email_verified, is_professional=is_professional,
+                   created_after=created_after, created_before=created_before)
+
+    async def rows():
+        # The request's session is closed before a streaming body is sent, so the export opens its own
+        async with Database.get_read_only_session_factory()() as session:
+            async for row in UserService.stream_rows(session, names, **filters):
+                yield row
+
+    if format == "csv":
+        return StreamingResponse(iter_csv_lines(rows(), names), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="users.csv"'})
+    return StreamingResponse(iter_ndjson_lines(rows(), names), media_type="application/x-ndjson")
+
+
 @router.get("/users/{user_id}", response_model=UserResponse, tags=["User Management"])
 async def get_user(
     user_id: UUID,
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     token: str = Depends(oauth2_scheme),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    user = await UserService.get_by_id(db, user_id)
+    user = await UserService.get_row_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserResponse.model_validate(user).model_copy(update={
@@ -43,7 +114,10 @@ async def update_user(
     token: str = Depends(oauth2_scheme),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    updated_user = await UserService.update(db, user_id, user_update.model_dump(exclude_unset=True))
+    try:
+        updated_user = await UserService.update(db, user_id, user_update.model_dump(exclude_unset=True))
+    except UniqueFieldTakenError as e:
+        raise HTTPException(status_code=400, detail=f"{e.field.capitalize()} already exists")
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserResponse.model_validate(updated_user).model_copy(update={
@@ -73,34 +147,111 @@ async def create_user(
     token: str = Depends(oauth2_scheme),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
+    outcome, created_user = await UserService.register_account(db, user.model_dump(), email_service)
+    if outcome is RegistrationOutcome.EMAIL_TAKEN:
         raise HTTPException(status_code=400, detail="Email already exists")
-    created_user = await UserService.create(db, user.model_dump(), email_service)
-    if not created_user:
+    if outcome is not RegistrationOutcome.CREATED:
         raise HTTPException(status_code=500, detail="Failed to create user")
     return UserResponse.model_validate(created_user).model_copy(update={
         "links": create_user_links(created_user.id, request)
     })
 
 
+@router.post("/users/lookup", response_model=UserBatchLookupResponse, tags=["User Management"])
+async def batch_lookup_users(
+    lookup: UserBatchLookupRequest,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
+):
+    """Resolve many user ids and emails in one query."""
+    if len(lookup.ids) + len(lookup.emails) > settings.user_batch_lookup_max:
+        raise HTTPException(status_code=400, detail=f"At most {settings.user_batch_lookup_max} ids and emails per request")
+    users, not_found = await UserService.batch_lookup(db, lookup.ids, lookup.emails)
+    return UserBatchLookupResponse(items=[UserResponse.model_validate(u) for u in users], not_found=not_found)
+
+
+@router.post("/users/import", tags=["User Management"])
+async def import_users(
+    request: Request,
+    current_user: dict = Depends(require_role(["ADMIN"]))
+):
+    """
+    Create users from a CSV (text/csv, header row first) or NDJSON (application/x-ndjson) body
+    with the fields of UserCreate. The response streams one NDJSON result per input row,
+    followed by a summary line.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == "text/csv":
+        parse = iter_csv_records
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        parse = iter_ndjson_records
+    else:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson")
+    # The body must be read before the response starts: while a StreamingResponse is sent,
+    # Starlette listens for a disconnect on the same receive channel and would eat body chunks.
+    # Spooling keeps memory bounded; large bodies move to a temporary file.
+    body = await spool(request.stream(), settings.user_import_spool_max_memory)
+
+    async def results():
+        try:
+            async for result in UserImportService.import_records(parse(iter_file_chunks(body), settings.user_import_max_line_length)):
+                yield json.dumps(result) + "\n"
+        finally:
+            body.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.post("/users/bulk", response_model=UserBulkResponse, tags=["User Management"])
+async def bulk_update_users(
+    bulk: UserBulkRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    email_service: EmailService = Depends(get_email_service),
+    current_user: dict = Depends(require_role(["ADMIN"]))
+):
+    """
+    Upgrade, lock, unlock, change the role of or delete many users with one statement. Targets
+    are a list of ids or a filter; professional upgrade emails are sent after the response.
+    """
+    if bulk.ids is not None and len(bulk.ids) > settings.user_bulk_max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {settings.user_bulk_max_ids} ids per request")
+    conditions = UserService.filter_conditions(**bulk.filter.model_dump()) if bulk.filter is not None else ()
+    changed = await UserService.bulk_apply(db, bulk.action, bulk.ids, conditions, bulk.role)
+    if changed is None:
+        raise HTTPException(status_code=500, detail="Bulk operation failed")
+    if bulk.action is UserBulkAction.UPGRADE and changed:
+        background_tasks.add_task(UserService.send_professional_upgrade_emails, email_service, changed)
+    outcome = "deleted" if bulk.action is UserBulkAction.DELETE else "updated"
+    results = [UserBulkResult(id=row.id, status=outcome) for row in changed]
+    if bulk.ids is not None:
+        # One result per requested id, with the ids that matched nobody in place
+        by_id = {result.id: result for result in results}
+        results = [by_id.get(user_id) or UserBulkResult(id=user_id, status="not_found") for user_id in dict.fromkeys(bulk.ids)]
+    return UserBulkResponse(action=bulk.action, matched=len(changed), results=results)
+
+
 @router.get("/users/", response_model=UserListResponse, tags=["User Management"])
 async def list_users(
     request: Request,
-    skip: int = 0,
-    limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor taken from a next or prev link"),
+    limit: int = Query(10, ge=1, le=100),
+    total: CountMode = Query(CountMode(settings.user_count_default_mode), description="How the total is computed"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(db)
-    users = await UserService.list_users(db, skip, limit)
+    try:
+        users, has_next, has_prev = await UserService.list_users_page(db, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    total_users = await UserService.count(db, total)
     user_responses = [UserResponse.model_validate(u) for u in users]
     return UserListResponse(
         items=user_responses,
         total=total_users,
-        page=skip // limit + 1,
+        total_mode=total.value,
         size=len(user_responses),
-        links=generate_pagination_links(request, skip, limit, total_users)
+        links=generate_pagination_links(request, users, limit, has_next, has_prev)
     )
 
 
@@ -126,10 +277,12 @@ async def register(
     session: AsyncSession = Depends(get_db),
     email_service: EmailService = Depends(get_email_service)
 ):
-    user = await UserService.register_user(session, user_data.model_dump(), email_service)
-    if user:
+    outcome, user = await UserService.register_account(session, user_data.model_dump(), email_service)
+    if outcome is RegistrationOutcome.CREATED:
         return user
-    raise HTTPException(status_code=400, detail="Email already exists")
+    if outcome is RegistrationOutcome.EMAIL_TAKEN:
+        raise HTTPException(status_code=400, detail="Email already exists")
+    raise HTTPException(status_code=500, detail="Failed to create user")
 
 
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
@@ -137,19 +290,37 @@ async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(get_db)
 ):
-    if await UserService.is_account_locked(session, form_data.username):
+    outcome, user = await UserService.authenticate(session, form_data.username, form_data.password, commit=False)
+    if outcome is LoginOutcome.LOCKED:
         raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-    user = await UserService.login_user(session, form_data.username, form_data.password)
-    if user:
+    if outcome is LoginOutcome.SUCCESS:
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = create_access_token(
             data={"sub": user.email, "role": str(user.role.name)},
             expires_delta=access_token_expires
         )
-        return {"access_token": access_token, "token_type": "bearer"}
+        refresh_token = await RefreshTokenService.issue(session, user.id)
+        await UserService.invalidate_committed(session)
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
     raise HTTPException(status_code=401, detail="Incorrect email or password")
 
 
+@router.post("/token/refresh", response_model=TokenResponse, tags=["Login and Registration"])
+async def refresh_access_token(
+    body: RefreshTokenRequest,
+    session: AsyncSession = Depends(get_db)
+):
+    rotated = await RefreshTokenService.rotate(session, body.refresh_token)
+    if not rotated:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    email, role, refresh_token = rotated
+    access_token = create_access_token(
+        data={"sub": email, "role": str(role.name)},
+        expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
 @router.get("/verify-email/{user_id}/{token}", status_code=200, tags=["Login and Registration"])
 async def verify_email(
     user_id: UUID,
@@ -6,6 +6,7 @@ from enum import Enum
 import uuid
 import re
 from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname
 
 
@@ -33,7 +34,7 @@ class UserBase(BaseModel):
     class Config:
         from_attributes = True
 
-from pydantic import field_validator
+from pydantic import field_validator, model_validator
 
 class UserCreate(UserBase):
     email: EmailStr = Field(..., example="john.doe@example.com")
@@ -97,5 +98,59 @@ class UserListResponse(BaseModel):
         "github_profile_url": "https://github.com/johndoe"
     }])
     total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    total_mode: str = Field("exact", example="exact", description="'exact', 'estimated' (planner statistics) or 'cached'")
     size: int = Field(..., example=10)
+    links: List[PaginationLink] = Field(default_factory=list, description="self, first and, where they exist, next and prev cursor links.")
+
+class UserBatchLookupRequest(BaseModel):
+    ids: List[uuid.UUID] = Field(default_factory=list, example=[uuid.uuid4()])
+    emails: List[EmailStr] = Field(default_factory=list, example=["john.doe@example.com"])
+
+class UserBatchLookupResponse(BaseModel):
+    items: List[UserResponse] = Field(..., description="Users found, in request order.")
+    not_found: List[str] = Field(..., example=["jane.doe@example.com"], description="Requested ids and emails that matched no user.")
+
+class UserSearchResponse(BaseModel):
+    items: List[UserResponse] = Field(..., description="Matching users in (created_at, id) order.")
+    size: int = Field(..., example=10)
+    links: List[PaginationLink] = Field(default_factory=list, description="self, first and, where they exist, next and prev cursor links.")
+
+class UserBulkAction(str, Enum):
+    UPGRADE = "upgrade"
+    LOCK = "lock"
+    UNLOCK = "unlock"
+    SET_ROLE = "set_role"
+    DELETE = "delete"
+
+class UserFilter(BaseModel):
+    role: Optional[UserRole] = None
+    is_locked: Optional[bool] = None
+    email_verified: Optional[bool] = None
+    is_professional: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+class UserBulkRequest(BaseModel):
+    action: UserBulkAction = Field(..., example="lock")
+    ids: Optional[List[uuid.UUID]] = Field(None, example=[uuid.uuid4()], description="Users to act on; give either ids or filter.")
+    filter: Optional[UserFilter] = Field(None, description="Act on every user matching all of these; at least one must be set.")
+    role: Optional[UserRole] = Field(None, example="AUTHENTICATED", description="New role, required by set_role.")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Give either ids or filter")
+        if self.filter is not None and not any(value is not None for value in self.filter.model_dump().values()):
+            raise ValueError("filter must set at least one field")
+        if (self.action == UserBulkAction.SET_ROLE) != (self.role is not None):
+            raise ValueError("role is required by set_role and only by set_role")
+        return self
+
+class UserBulkResult(BaseModel):
+    id: uuid.UUID
+    status: str = Field(..., example="updated", description="'updated', 'deleted' or 'not_found'; an upgrade reports users who are already professional as 'not_found'")
+
+class UserBulkResponse(BaseModel):
+    action: UserBulkAction
+    matched: int = Field(..., example=1, description="Users the statement changed.")
+    results: List[UserBulkResult] = Field(..., description="One result per requested id in request order, or per matched user with a filter.")
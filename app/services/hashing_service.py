@@ -0,0 +1,168 @@
+# app/services/hashing_service.py
+from builtins import Exception, bool, dict, int, str
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import IntEnum
+from functools import partial
+from logging import getLogger
+from typing import Optional
+
+from app.utils.password_hashers import PasswordHasher, check_password, make_password
+from settings.config import settings
+
+logger = getLogger(__name__)
+
+
+class HashPriority(IntEnum):
+    """Scheduling lanes for password work. Lower values are dispatched first."""
+    LOGIN = 0
+    REGISTRATION = 1
+    BULK = 2
+
+
+class HashingQueueFullError(Exception):
+    """Raised when the hashing queue is saturated and a job cannot be accepted."""
+
+
+class HashingService:
+    """
+    Runs password hashing and verification on a bounded worker pool so the event
+    loop is never blocked by password work.
+
+    Jobs wait in one lane per `HashPriority`; whenever a worker frees up the
+    oldest job of the most urgent non-empty lane is dispatched. At most
+    `max_queue_size` jobs may be waiting at once, further submissions raise
+    `HashingQueueFullError`.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, executor_type: str = "thread"):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.executor_type = executor_type
+        self._executor: Optional[Executor] = None
+        self._lanes = {priority: deque() for priority in HashPriority}
+        self._running = 0
+        self._stats = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hashing")
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    async def hash(self, password: str, priority: HashPriority = HashPriority.REGISTRATION, hasher: Optional[PasswordHasher] = None) -> str:
+        """Hash `password` on the worker pool with `hasher`, or the configured default hasher."""
+        return await self.submit(priority, make_password, password, hasher)
+
+    async def verify(self, plain_password: str, hashed_password: str, priority: HashPriority = HashPriority.LOGIN) -> bool:
+        """Verify `plain_password` against `hashed_password` on the worker pool."""
+        return await self.submit(priority, check_password, plain_password, hashed_password)
+
+    async def submit(self, priority: HashPriority, func, *args, **kwargs):
+        """Queue `func(*args, **kwargs)` in the given lane and wait for its result."""
+        if self.queue_depth >= self.max_queue_size:
+            self._stats["rejected"] += 1
+            logger.warning("Hashing queue saturated (%d waiting), rejecting job.", self.queue_depth)
+            raise HashingQueueFullError("Password hashing queue is full")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._lanes[HashPriority(priority)].append((loop, future, func, args, kwargs, time.perf_counter()))
+        self._dispatch()
+        return await future
+
+    def _next_job(self):
+        for priority in HashPriority:
+            lane = self._lanes[priority]
+            while lane:
+                job = lane.popleft()
+                if not job[1].done():  # skip jobs whose caller has gone away
+                    return job
+        return None
+
+    def _dispatch(self):
+        while self._running < self.max_workers:
+            job = self._next_job()
+            if job is None:
+                return
+            loop, future, func, args, kwargs, enqueued_at = job
+            self._running += 1
+            started_at = time.perf_counter()
+            self._record("wait", started_at - enqueued_at)
+            call = loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+            call.add_done_callback(lambda done, f=future, s=started_at: self._on_done(done, f, s))
+
+    def _on_done(self, done: asyncio.Future, future: asyncio.Future, started_at: float):
+        self._running -= 1
+        self._record("hash", time.perf_counter() - started_at)
+        if done.cancelled() or done.exception() is not None:
+            self._stats["failed"] += 1
+            if not future.done():
+                future.set_exception(done.exception() if not done.cancelled() else asyncio.CancelledError())
+        else:
+            self._stats["completed"] += 1
+            if not future.done():
+                future.set_result(done.result())
+        self._dispatch()
+
+    def _record(self, kind: str, seconds: float):
+        self._stats[f"{kind}_seconds_total"] += seconds
+        if seconds > self._stats[f"{kind}_seconds_max"]:
+            self._stats[f"{kind}_seconds_max"] = seconds
+
+    def metrics(self) -> dict:
+        """Snapshot of queue depth, pool usage and hash latency."""
+        finished = self._stats["completed"] + self._stats["failed"]
+        started = finished + self._running
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "running": self._running,
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_lane": {priority.name.lower(): len(lane) for priority, lane in self._lanes.items()},
+            "completed": self._stats["completed"],
+            "failed": self._stats["failed"],
+            "rejected": self._stats["rejected"],
+            "hash_latency_ms_avg": round(self._stats["hash_seconds_total"] / finished * 1000, 3) if finished else 0.0,
+            "hash_latency_ms_max": round(self._stats["hash_seconds_max"] * 1000, 3),
+            "queue_wait_ms_avg": round(self._stats["wait_seconds_total"] / started * 1000, 3) if started else 0.0,
+            "queue_wait_ms_max": round(self._stats["wait_seconds_max"] * 1000, 3),
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool. A new one is created lazily on the next job."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_hashing_service: Optional[HashingService] = None
+
+
+def get_hashing_service() -> HashingService:
+    """Return the process-wide hashing service, creating it from settings on first use."""
+    global _hashing_service
+    if _hashing_service is None:
+        _hashing_service = HashingService(
+            max_workers=settings.password_hash_workers,
+            max_queue_size=settings.password_hash_queue_size,
+            executor_type=settings.password_hash_executor,
+        )
+    return _hashing_service
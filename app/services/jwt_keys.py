@@ -0,0 +1,132 @@
+# app/services/jwt_keys.py
+from builtins import ValueError, bool, dict, list, str
+import argparse
+import secrets
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from settings.config import settings
+
+
+class JWTKey:
+    """A parsed signing key. Keys loaded from a public PEM can only verify tokens."""
+
+    def __init__(self, kid: str, algorithm: str, public_key, private_key=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.public_key = public_key
+        self.private_key = private_key
+
+    @property
+    def can_sign(self) -> bool:
+        return self.private_key is not None
+
+    def to_jwk(self) -> dict:
+        jwk = jwt.get_algorithm_by_name(self.algorithm).to_jwk(self.public_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+def _algorithm_for(key) -> str:
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    raise ValueError(f"Unsupported JWT key type: {type(key).__name__}")
+
+
+def load_key(kid: str, pem: bytes) -> JWTKey:
+    """Parse a PEM encoded RSA or Ed25519 key, private or public."""
+    if b"PRIVATE KEY" in pem:
+        private_key = serialization.load_pem_private_key(pem, password=None)
+        return JWTKey(kid, _algorithm_for(private_key), private_key.public_key(), private_key)
+    public_key = serialization.load_pem_public_key(pem)
+    return JWTKey(kid, _algorithm_for(public_key), public_key)
+
+
+class KeyRing:
+    """
+    The set of keys tokens may be signed with. New tokens are signed with the
+    active key; every key in the ring is accepted when verifying, which lets
+    old tokens keep working while keys are rotated.
+    """
+
+    def __init__(self, keys: List[JWTKey], active_kid: Optional[str] = None):
+        self._keys: Dict[str, JWTKey] = {key.kid: key for key in keys}
+        signing_keys = [key for key in keys if key.can_sign]
+        if active_kid:
+            if active_kid not in self._keys or not self._keys[active_kid].can_sign:
+                raise ValueError(f"Active JWT key '{active_kid}' is not a private key in the key ring")
+            self.signing_key = self._keys[active_kid]
+        elif signing_keys:
+            self.signing_key = signing_keys[0]
+        else:
+            raise ValueError("The JWT key ring needs at least one private key")
+
+    def get(self, kid: Optional[str]) -> Optional[JWTKey]:
+        return self._keys.get(kid) if kid else None
+
+    def jwks(self) -> dict:
+        return {"keys": [key.to_jwk() for key in self._keys.values()]}
+
+    @classmethod
+    def from_setting(cls, spec: str, active_kid: Optional[str] = None) -> "KeyRing":
+        """
+        Build a key ring from a comma separated list of `kid=path/to/key.pem`
+        entries. When the `kid=` part is omitted the file name is used.
+        """
+        keys = []
+        for entry in filter(None, (part.strip() for part in spec.split(","))):
+            kid, _, path = entry.rpartition("=")
+            path = Path(path)
+            keys.append(load_key(kid or path.stem, path.read_bytes()))
+        return cls(keys, active_kid)
+
+
+_key_ring: Optional[KeyRing] = None
+
+
+def get_key_ring() -> Optional[KeyRing]:
+    """
+    Return the configured key ring, parsing the key files on first use.
+    Returns None when no asymmetric keys are configured and tokens are
+    signed with the shared `jwt_secret_key` instead.
+    """
+    global _key_ring
+    if _key_ring is None and settings.jwt_keys:
+        _key_ring = KeyRing.from_setting(settings.jwt_keys, settings.jwt_active_kid or None)
+    return _key_ring
+
+
+def generate_private_key_pem(algorithm: str) -> bytes:
+    if algorithm == "RS256":
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+    return key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a new JWT signing key for rotation.")
+    parser.add_argument("--algorithm", default="EdDSA", choices=["RS256", "EdDSA"])
+    parser.add_argument("--kid", default=None, help="Key id, defaults to a random value")
+    parser.add_argument("--out-dir", default="keys")
+    args = parser.parse_args()
+
+    kid = args.kid or secrets.token_hex(8)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{kid}.pem"
+    path.write_bytes(generate_private_key_pem(args.algorithm))
+    path.chmod(0o600)
+    print(f"Wrote {path}. Add '{kid}={path}' to JWT_KEYS, then set JWT_ACTIVE_KID={kid} once downstream JWKS caches have picked it up.")
@@ -1,8 +1,14 @@
 # app/services/jwt_service.py
 from builtins import dict, str
+import hashlib
 import jwt
 from datetime import datetime, timedelta
 from settings.config import settings
+from app.services.jwt_keys import get_key_ring
+from app.utils.lru_cache import LRUCache
+
+# Verified claims keyed by a digest of the raw token; each entry expires at the token's `exp`.
+verified_token_cache = LRUCache(max_size=settings.jwt_cache_size)
 
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -11,12 +17,33 @@ def create_access_token(*, data: dict, expires_delta: timedelta = None):
         to_encode['role'] = to_encode['role'].upper()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
-    return encoded_jwt
+    key_ring = get_key_ring()
+    if key_ring is None:
+        return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    signing_key = key_ring.signing_key
+    return jwt.encode(to_encode, signing_key.private_key, algorithm=signing_key.algorithm, headers={"kid": signing_key.kid})
 
 def decode_token(token: str):
     try:
-        decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return decoded
+        key_ring = get_key_ring()
+        if key_ring is None:
+            return jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+        key = key_ring.get(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
     except jwt.PyJWTError:
         return None
+
+def decode_token_cached(token: str):
+    """Like `decode_token`, but reuses the claims of tokens that were already verified."""
+    if not settings.jwt_cache_enabled:
+        return decode_token(token)
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = verified_token_cache.get(key)
+    if payload is None:
+        payload = decode_token(token)
+        # Only tokens with an expiry are cached, so an entry can never outlive its token.
+        if payload is not None and "exp" in payload:
+            verified_token_cache.set(key, payload, expires_at=float(payload["exp"]))
+    return dict(payload) if payload is not None else None
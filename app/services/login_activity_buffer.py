@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+import asyncio
+import logging
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database
+from app.models.user_model import User
+from app.dependencies import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class LoginActivityBuffer:
+    """
+    Write-behind buffer for the `last_login_at` bookkeeping of successful logins.
+
+    Timestamps are merged per user in memory and written as one bulk UPDATE by primary key,
+    either every `interval` seconds, as soon as `max_pending` users are waiting, or at shutdown.
+    Only `last_login_at` is ever deferred: failed attempt counters and lockouts are still written
+    synchronously by `UserService.authenticate`, so lockout decisions stay correct when several
+    workers share the database.
+    """
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Dict[UUID, datetime] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats = {"recorded": 0, "flushed": 0, "batches": 0, "errors": 0}
+
+    def record(self, user_id: UUID, logged_in_at: datetime):
+        previous = self._pending.get(user_id)
+        if previous is None or logged_in_at > previous:
+            self._pending[user_id] = logged_in_at
+        self._stats["recorded"] += 1
+        if len(self._pending) >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self, session: Optional[AsyncSession] = None) -> int:
+        """Write all pending timestamps in one batch. Returns the number of users in the batch."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        rows = [{"b_id": user_id, "b_last_login_at": logged_in_at} for user_id, logged_in_at in pending.items()]
+        try:
+            if session is not None:
+                await self._write(session, rows)
+            else:
+                async with Database.get_session_factory()() as own_session:
+                    await self._write(own_session, rows)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(rows)} login timestamps: {e}")
+            self._stats["errors"] += 1
+            for user_id, logged_in_at in pending.items():
+                if user_id not in self._pending:
+                    self._pending[user_id] = logged_in_at
+            return 0
+        self._stats["flushed"] += len(rows)
+        self._stats["batches"] += 1
+        return len(rows)
+
+    @staticmethod
+    async def _write(session: AsyncSession, rows):
+        # One executemany for the whole batch. GREATEST keeps a newer timestamp written by another
+        # worker, and users deleted or locked since their login simply match no row.
+        users = User.__table__
+        query = (
+            update(users)
+            .where(users.c.id == bindparam("b_id"), users.c.is_locked.is_not(True))
+            .values(last_login_at=func.greatest(users.c.last_login_at, bindparam("b_last_login_at")))
+        )
+        await session.execute(query, rows)
+        await session.commit()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self):
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush timer and write whatever is still pending."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+
+    def metrics(self) -> dict:
+        return {"pending": len(self._pending), **self._stats}
+
+login_activity_buffer = LoginActivityBuffer(
+    interval=settings.login_write_behind_interval,
+    max_pending=settings.login_write_behind_max_pending,
+)
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from uuid import UUID, uuid4
+import hashlib
+import logging
+import secrets
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User, UserRole
+from app.dependencies import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class RefreshTokenService:
+    @staticmethod
+    def _digest(token: str) -> str:
+        # Refresh tokens are 256 random bits, so a fast digest is enough; no password hashing needed.
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _new_token_values(cls, user_id: UUID, family_id: UUID) -> Tuple[str, dict]:
+        token = secrets.token_urlsafe(32)
+        return token, {
+            "id": uuid4(),
+            "user_id": user_id,
+            "family_id": family_id,
+            "token_hash": cls._digest(token),
+            "expires_at": datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expire_minutes),
+        }
+
+    @classmethod
+    async def issue(cls, session: AsyncSession, user_id: UUID) -> str:
+        """Issue a refresh token that starts a new rotation family."""
+        token, values = cls._new_token_values(user_id, uuid4())
+        await session.execute(insert(RefreshToken).values(**values))
+        await session.commit()
+        return token
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, token: str) -> Optional[Tuple[str, UserRole, str]]:
+        """
+        Exchange a refresh token for a new one.
+
+        The presented token is revoked and the owner's email and role are read in a single
+        UPDATE ... FROM users ... RETURNING on the unique token_hash index. Returns
+        (email, role, new_token), or None if the token is unknown, expired, already used or
+        belongs to a locked account. Presenting an already used token revokes its whole family.
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = cls._digest(token)
+        tokens, users = RefreshToken.__table__, User.__table__
+        # Core statement: the ORM cannot map RETURNING columns from the joined users table.
+        query = (
+            update(tokens)
+            .where(
+                tokens.c.token_hash == token_hash,
+                tokens.c.revoked_at.is_(None),
+                tokens.c.expires_at > now,
+                tokens.c.user_id == users.c.id,
+                users.c.is_locked.isnot(True),
+            )
+            .values(revoked_at=now)
+            .returning(tokens.c.user_id, tokens.c.family_id, users.c.email, users.c.role)
+        )
+        row = (await session.execute(query)).first()
+        if row is None:
+            await cls._revoke_family_if_reused(session, token_hash, now)
+            return None
+
+        new_token, values = cls._new_token_values(row.user_id, row.family_id)
+        await session.execute(insert(RefreshToken).values(**values))
+        await session.commit()
+        return row.email, row.role, new_token
+
+    @classmethod
+    async def _revoke_family_if_reused(cls, session: AsyncSession, token_hash: str, now: datetime):
+        result = await session.execute(
+            select(RefreshToken.family_id, RefreshToken.user_id)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.revoked_at.isnot(None))
+        )
+        reused = result.first()
+        if reused is not None:
+            logger.warning(f"Refresh token reuse detected for user {reused.user_id}, revoking token family {reused.family_id}.")
+            await session.execute(
+                update(RefreshToken)
+                .where(RefreshToken.family_id == reused.family_id, RefreshToken.revoked_at.is_(None))
+                .values(revoked_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await session.commit()
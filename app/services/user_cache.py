@@ -0,0 +1,298 @@
+from builtins import Exception, bool, dict, float, int, isinstance, issubclass, len, list, str
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID, uuid4
+import asyncio
+import json
+import logging
+import math
+
+from app.models.user_model import User
+from app.utils.lru_cache import LRUCache
+from app.dependencies import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Secrets never enter the cache, whichever columns a caller stores
+CACHED_COLUMNS = {column.key: column for column in User.__table__.columns if column.key not in ("hashed_password", "verification_token")}
+_PARSERS: Dict[str, Callable[[Any], Any]] = {}
+for _column in CACHED_COLUMNS.values():
+    _type = _column.type.python_type
+    if issubclass(_type, datetime):
+        _PARSERS[_column.key] = datetime.fromisoformat
+    elif issubclass(_type, (UUID, Enum)):
+        _PARSERS[_column.key] = _type
+
+
+def _encode(values: dict) -> str:
+    def plain(value):
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+    return json.dumps(values, default=plain)
+
+
+def _decode(raw) -> dict:
+    values = json.loads(raw)
+    return {key: _PARSERS[key](value) if value is not None and key in _PARSERS else value for key, value in values.items()}
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for a shared cache tier and its invalidation channel. Every UserCache
+    of the process sees the same entries and broadcasts, which is what several workers see
+    through Redis.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self._entries = LRUCache(max_size=max_keys)
+        self._subscribers = []
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._entries.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.delete(key)
+
+    async def publish(self, message: str):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    async def listen(self, callback: Callable[[str], None]):
+        self._subscribers.append(callback)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._subscribers.remove(callback)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """Shared tier in Redis; invalidations are broadcast on a pub/sub channel."""
+
+    def __init__(self, url: str, prefix: str = "usercache:"):
+        # Imported here so the redis package is only needed when a shared tier is configured.
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self.channel = prefix + "invalidate"
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._client.set(self.prefix + key, value, ex=max(1, math.ceil(ttl)))
+
+    async def delete(self, *keys: str):
+        await self._client.delete(*(self.prefix + key for key in keys))
+
+    async def publish(self, message: str):
+        await self._client.publish(self.channel, message)
+
+    async def listen(self, callback: Callable[[str], None]):
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    callback(message["data"].decode("utf-8"))
+        finally:
+            await pubsub.reset()
+
+    async def close(self):
+        await self._client.close()
+
+
+class UserCache:
+    """
+    Read-through cache of read-only user rows by id and by email, in front of
+    `UserService.get_row_by_id` and `get_row_by_email`. Writers never read from it.
+
+    The first tier is an LRU with TTL in this process; the optional shared tier (Redis, or the
+    in-process stand-in) is asked on a local miss. Entries are the row's values keyed by id
+    (CACHED_COLUMNS only), plus an email -> id index that is only trusted when the entry still
+    has that email. Writers call `invalidate` after committing: the entry is dropped here and in the
+    shared tier, and the ids are broadcast so other workers drop their local copies. Without a
+    shared tier there is no broadcast, so several workers rely on the TTL alone.
+
+    Reads may come from a replica that has not replayed the write yet, or may have started
+    before it committed. So `invalidate` also holds each id for `hold` seconds, here, in the
+    shared tier and in the workers that get the broadcast, and `store` refuses held ids: until
+    the hold ends, reads of that user go to the database and are not cached.
+    """
+
+    def __init__(self, max_size: int, ttl: float, shared=None, enabled: bool = True, hold: float = 0.0):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.hold = hold
+        self.shared = shared
+        self.local = LRUCache(max_size=max_size, default_ttl=ttl)
+        self.holds = LRUCache(max_size=max_size, default_ttl=hold)
+        self.worker_id = uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0,
+                       "stores_held": 0,
+                       "broadcasts_sent": 0, "broadcasts_received": 0, "shared_errors": 0}
+
+    async def get(self, column: str, value) -> Optional[dict]:
+        """The cached values of the user whose `column` ("id" or "email") is `value`, or None on a miss."""
+        if not self.enabled:
+            return None
+        values = self._local_get(column, value)
+        if values is not None:
+            self._stats["local_hits"] += 1
+            return values
+        if self.shared is not None:
+            values = await self._shared_get(column, value)
+            if values is not None:
+                self._stats["shared_hits"] += 1
+                self._local_set(values)
+                return values
+        self._stats["misses"] += 1
+        return None
+
+    def _local_get(self, column: str, value) -> Optional[dict]:
+        user_id = value if column == "id" else self.local.get(f"email:{value}")
+        values = self.local.get(f"id:{user_id}") if user_id is not None else None
+        return values if values is not None and str(values[column]) == str(value) else None
+
+    def _local_set(self, values: dict):
+        self.local.set(f"id:{values['id']}", values)
+        self.local.set(f"email:{values['email']}", values["id"])
+
+    async def _shared_get(self, column: str, value) -> Optional[dict]:
+        try:
+            user_id = value if column == "id" else await self.shared.get(f"email:{value}")
+            raw = await self.shared.get(f"id:{user_id}") if user_id is not None else None
+        except Exception as e:
+            logger.error(f"User cache shared tier error: {e}")
+            self._stats["shared_errors"] += 1
+            return None
+        values = _decode(raw) if raw is not None else None
+        return values if values is not None and str(values[column]) == str(value) else None
+
+    async def store(self, values: dict):
+        if not self.enabled:
+            return
+        values = {key: value for key, value in values.items() if key in CACHED_COLUMNS}
+        if self.holds.get(str(values["id"])) is not None:
+            self._stats["stores_held"] += 1
+            return
+        if self.shared is not None:
+            try:
+                if await self.shared.get(f"hold:{values['id']}") is not None:
+                    self._stats["stores_held"] += 1
+                    return
+            except Exception as e:
+                logger.error(f"User cache shared tier error: {e}")
+                self._stats["shared_errors"] += 1
+                return
+        self._local_set(values)
+        if self.shared is not None:
+            try:
+                await self.shared.set(f"id:{values['id']}", _encode(values), self.ttl)
+                await self.shared.set(f"email:{values['email']}", str(values["id"]), self.ttl)
+            except Exception as e:
+                logger.error(f"User cache shared tier error: {e}")
+                self._stats["shared_errors"] += 1
+
+    async def invalidate(self, *user_ids):
+        """Drop the users everywhere; call after the write that changed them has committed."""
+        if not self.enabled or not user_ids:
+            return
+        self._drop(user_ids)
+        self._stats["invalidations"] += len(user_ids)
+        if self.shared is None:
+            return
+        try:
+            if self.hold > 0:
+                for user_id in user_ids:
+                    await self.shared.set(f"hold:{user_id}", "1", self.hold)
+            await self.shared.delete(*(f"id:{user_id}" for user_id in user_ids))
+            await self.shared.publish(json.dumps({"origin": self.worker_id, "ids": [str(user_id) for user_id in user_ids]}))
+            self._stats["broadcasts_sent"] += 1
+        except Exception as e:
+            logger.error(f"User cache shared tier error: {e}")
+            self._stats["shared_errors"] += 1
+
+    def _on_broadcast(self, message: str):
+        data = json.loads(message)
+        if data["origin"] == self.worker_id:
+            return
+        self._drop(data["ids"])
+        self._stats["broadcasts_received"] += 1
+
+    def _drop(self, user_ids):
+        for user_id in user_ids:
+            self.local.delete(f"id:{user_id}")
+            if self.hold > 0:
+                self.holds.set(str(user_id), True)
+
+    async def _listen(self):
+        while True:
+            try:
+                await self.shared.listen(self._on_broadcast)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"User cache invalidation channel error: {e}")
+                self._stats["shared_errors"] += 1
+                await asyncio.sleep(1)
+
+    def start(self):
+        """Subscribe to invalidation broadcasts from other workers."""
+        if self.enabled and self.shared is not None and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.shared is not None:
+            await self.shared.close()
+
+    def clear(self):
+        self.local.clear()
+        self.holds.clear()
+
+    def metrics(self) -> dict:
+        hits = self._stats["local_hits"] + self._stats["shared_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+            "size": len(self.local),
+            "evictions": self.local.evictions,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            **self._stats,
+        }
+
+
+def build_user_cache() -> UserCache:
+    url = settings.user_cache_shared_url
+    shared = None
+    if url == "memory://":
+        shared = MemoryBackend()
+    elif url:
+        shared = RedisBackend(url)
+    return UserCache(settings.user_cache_size, settings.user_cache_ttl, shared, enabled=settings.user_cache_enabled,
+                     hold=settings.user_cache_invalidation_hold)
+
+
+user_cache = build_user_cache()
@@ -0,0 +1,141 @@
+from builtins import Exception, dict, int, isinstance, len, list, set, str, zip
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import uuid4
+import asyncio
+import logging
+
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Database
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import UserCreate
+from app.services.hashing_service import HashPriority, get_hashing_service
+from app.services.user_service import user_count_cache
+from app.utils.nickname_gen import generate_nickname
+from app.utils.record_stream import Record
+from app.utils.security import generate_verification_token
+from app.dependencies import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class UserImportService:
+    """
+    Bulk user import from a stream of parsed records.
+
+    Records are consumed `chunk_size` at a time: each chunk is validated with `UserCreate`,
+    its passwords are hashed in the BULK lane of the hashing pool (never more jobs queued than
+    there are workers, so logins and registrations are not starved), and its valid rows go in
+    as one multi-row `INSERT ... ON CONFLICT DO NOTHING` committed per chunk. A result is
+    yielded per record as soon as its chunk is done, so memory stays bounded by one chunk
+    however large the input is.
+
+    Imported users get the role from the record (ANONYMOUS when missing) and a verification
+    token; verification emails are not sent from the import.
+    """
+
+    @classmethod
+    async def import_records(cls, records: AsyncIterator[Record], session: Optional[AsyncSession] = None, chunk_size: Optional[int] = None) -> AsyncIterator[dict]:
+        """Yield one result per record, then a final `{"summary": {status: count}}`."""
+        chunk_size = chunk_size or settings.user_import_chunk_size
+        summary: Dict[str, int] = {}
+        if session is None:
+            async with Database.get_session_factory()() as own_session:
+                async for result in cls._import(own_session, records, chunk_size, summary):
+                    yield result
+        else:
+            async for result in cls._import(session, records, chunk_size, summary):
+                yield result
+        yield {"summary": summary}
+
+    @classmethod
+    async def _import(cls, session: AsyncSession, records: AsyncIterator[Record], chunk_size: int, summary: Dict[str, int]) -> AsyncIterator[dict]:
+        chunk: List[Record] = []
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                for result in await cls._import_chunk(session, chunk):
+                    summary[result["status"]] = summary.get(result["status"], 0) + 1
+                    yield result
+                chunk = []
+        if chunk:
+            for result in await cls._import_chunk(session, chunk):
+                summary[result["status"]] = summary.get(result["status"], 0) + 1
+                yield result
+
+    @classmethod
+    async def _import_chunk(cls, session: AsyncSession, chunk: List[Record]) -> List[dict]:
+        results: Dict[int, dict] = {}
+        valid: Dict[int, dict] = {}
+        seen_emails = set()
+        for line, record, error in chunk:
+            if error is not None:
+                results[line] = {"line": line, "status": "invalid", "error": error}
+                continue
+            record.setdefault("role", UserRole.ANONYMOUS.name)
+            try:
+                data = UserCreate(**record).model_dump()
+            except ValidationError as e:
+                errors = "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors())
+                results[line] = {"line": line, "email": record.get("email"), "status": "invalid", "error": errors}
+                continue
+            if data["email"] in seen_emails:
+                results[line] = {"line": line, "email": data["email"], "status": "conflict", "error": "Duplicate email in this chunk"}
+                continue
+            seen_emails.add(data["email"])
+            valid[line] = data
+
+        hashed = await cls._hash_passwords([data.pop("password") for data in valid.values()])
+        rows = []
+        for (line, data), hashed_password in zip(valid.items(), hashed):
+            if isinstance(hashed_password, Exception):
+                logger.error(f"Hashing failed for import line {line}: {hashed_password}")
+                results[line] = {"line": line, "email": data["email"], "status": "error", "error": "Password hashing failed"}
+                continue
+            data.update(
+                id=uuid4(),
+                hashed_password=hashed_password,
+                nickname=data["nickname"] or generate_nickname(),
+                verification_token=generate_verification_token(),
+                email_verified=False,
+                is_professional=False,
+                is_locked=False,
+                failed_login_attempts=0,
+            )
+            rows.append((line, data))
+
+        if rows:
+            status, error = "conflict", "Email or nickname already exists"
+            try:
+                result = await session.execute(
+                    insert(User).values([data for _, data in rows]).on_conflict_do_nothing().returning(User.id)
+                )
+                created = {row.id for row in result}
+                await session.commit()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error during import: {e}")
+                await session.rollback()
+                created, status, error = set(), "error", "Database error"
+            if created:
+                user_count_cache.clear()
+            for line, data in rows:
+                if data["id"] in created:
+                    results[line] = {"line": line, "email": data["email"], "status": "created", "id": str(data["id"])}
+                else:
+                    results[line] = {"line": line, "email": data["email"], "status": status, "error": error}
+
+        return [results[line] for line, _, _ in chunk]
+
+    @classmethod
+    async def _hash_passwords(cls, passwords: List[str]) -> list:
+        service = get_hashing_service()
+        slots = asyncio.Semaphore(service.max_workers)
+
+        async def hash_one(password: str) -> str:
+            async with slots:
+                return await service.hash(password, HashPriority.BULK)
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords), return_exceptions=True)
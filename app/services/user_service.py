@@ -1,29 +1,108 @@
+from collections import namedtuple
 from datetime import datetime, timezone
-from typing import Optional, Dict, List
-from uuid import UUID
+from enum import Enum
+from typing import Any, AsyncIterator, Optional, Dict, List, Sequence, Tuple
+from uuid import UUID, uuid4
 import logging
 
 from pydantic import ValidationError
-from sqlalchemy import select, update, func
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Integer, String, any_, bindparam, case, cast, delete, exists, select, text, update, func, or_, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.database import Database
 from app.models.user_model import User, UserRole
-from app.schemas.user_schemas import UserCreate, UserUpdate
-from app.utils.security import hash_password, verify_password, generate_verification_token
+from app.schemas.user_schemas import UserBulkAction, UserCreate, UserResponse, UserUpdate
+from app.utils.password_hashers import password_needs_rehash
+from app.utils.cursor import NEXT, PREV, decode_cursor
+from app.utils.group_commit import GroupCommit
+from app.utils.lru_cache import LRUCache
+from app.utils.security import generate_verification_token
 from app.utils.nickname_gen import generate_nickname
 from app.services.email_service import EmailService
+from app.services.hashing_service import HashPriority, HashingQueueFullError, get_hashing_service
+from app.services.login_activity_buffer import login_activity_buffer
+from app.services.user_cache import user_cache
 from app.dependencies import get_settings
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+
+# Holds the exact user count for CountMode.CACHED; dropped whenever a user is created or deleted
+user_count_cache = LRUCache(max_size=1, default_ttl=settings.user_count_cache_ttl)
+
+# Only the columns UserResponse reads (plus created_at for pagination cursors). Read endpoints
+# select these into plain rows, skipping password hashes, tokens and ORM identity-map bookkeeping.
+USER_RESPONSE_COLUMNS = tuple(getattr(User, name) for name in UserResponse.model_fields) + (User.created_at,)
+# What `get_row_by_id` returns on a user_cache hit: the same fields as a USER_RESPONSE_COLUMNS row
+CachedUserRow = namedtuple("CachedUserRow", [column.key for column in USER_RESPONSE_COLUMNS])
+
+# Columns that may leave the service in exports; secrets are never exported
+EXPORTABLE_COLUMNS = {column.key: column for column in User.__table__.columns if column.key not in ("hashed_password", "verification_token")}
+
+# Hot statements are built once at import. SQLAlchemy memoizes the cache key of a statement
+# object, so executing one of these skips statement construction and cache-key generation and
+# goes straight to the compiled-SQL cache and the connection's prepared statement.
+_USER_BY = {name: select(User).where(getattr(User, name) == bindparam(name)) for name in ("id", "email", "nickname")}
+_USER_ROW_BY = {name: select(*USER_RESPONSE_COLUMNS).where(getattr(User, name) == bindparam(name)) for name in ("id", "email")}
+_USER_COUNT = select(func.count()).select_from(User)
+_PAGE_KEY = (User.created_at, User.id)
+_PAGE_AFTER = tuple_(*_PAGE_KEY) > tuple_(bindparam("created_at", type_=User.created_at.type), bindparam("user_id", type_=User.id.type))
+_PAGE_BEFORE = tuple_(*_PAGE_KEY) < tuple_(bindparam("created_at", type_=User.created_at.type), bindparam("user_id", type_=User.id.type))
+_USER_PAGE = {
+    None: select(*USER_RESPONSE_COLUMNS).order_by(*_PAGE_KEY).limit(bindparam("limit", type_=Integer)),
+    NEXT: select(*USER_RESPONSE_COLUMNS).where(_PAGE_AFTER).order_by(*_PAGE_KEY).limit(bindparam("limit", type_=Integer)),
+    PREV: select(*USER_RESPONSE_COLUMNS).where(_PAGE_BEFORE).order_by(*(column.desc() for column in _PAGE_KEY)).limit(bindparam("limit", type_=Integer)),
+}
+
+_UNIQUE_VIOLATION = "23505"
+_EMAIL_UNIQUE_INDEX = "ix_users_email"
+_UNIQUE_INDEX_FIELDS = {_EMAIL_UNIQUE_INDEX: "email", "ix_users_nickname": "nickname"}
+
+def _violated_unique_constraint(error: IntegrityError) -> Optional[str]:
+    """Name of the unique constraint or index `error` violated; None for other integrity errors."""
+    if getattr(error.orig, "sqlstate", None) != _UNIQUE_VIOLATION:
+        return None
+    # The DBAPI adapter wraps the driver's exception, which carries the constraint name
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+class UniqueFieldTakenError(Exception):
+    """An update would give a user the email or nickname another user already has."""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field} is already taken")
+        self.field = field
+
+class RegistrationOutcome(Enum):
+    CREATED = "created"
+    EMAIL_TAKEN = "email_taken"
+    INVALID = "invalid"
+    FAILED = "failed"
+
+class LoginOutcome(Enum):
+    SUCCESS = "success"
+    INVALID_CREDENTIALS = "invalid_credentials"
+    LOCKED = "locked"
+
 class UserService:
     @classmethod
-    async def _execute_query(cls, session: AsyncSession, query):
+    async def _execute_query(cls, session: AsyncSession, query, params: Optional[dict] = None, commit: bool = False):
+        """
+        Execute `query`, rolling back and returning None on database errors. Reads never commit;
+        writes pass commit=True when the statement completes a unit of work.
+        """
         try:
-            result = await session.execute(query)
-            await session.commit()
+            result = await session.execute(query, params)
+            if commit:
+                await session.commit()
             return result
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
@@ -31,120 +110,522 @@ class UserService:
             return None
 
     @classmethod
-    async def _fetch_user(cls, session: AsyncSession, **filters) -> Optional[User]:
-        query = select(User).filter_by(**filters)
-        result = await cls._execute_query(session, query)
+    async def _fetch_user(cls, session: AsyncSession, column: str, value) -> Optional[User]:
+        result = await cls._execute_query(session, _USER_BY[column], {column: value})
         return result.scalars().first() if result else None
 
     @classmethod
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
-        return await cls._fetch_user(session, id=user_id)
+        return await cls._fetch_user(session, "id", user_id)
+
+    @classmethod
+    async def _fetch_row(cls, session: AsyncSession, column: str, value) -> Optional[Row]:
+        values = await user_cache.get(column, value)
+        if values is not None:
+            return CachedUserRow(**values)
+        result = await session.execute(_USER_ROW_BY[column], {column: value})
+        row = result.first()
+        if row is not None:
+            await user_cache.store(row._asdict())
+        return row
+
+    @classmethod
+    async def get_row_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[Row]:
+        """
+        Like `get_by_id`, but returns a read-only row of USER_RESPONSE_COLUMNS instead of an entity.
+        Rows are read through `user_cache`; a hit returns an equivalent CachedUserRow without a query.
+        """
+        return await cls._fetch_row(session, "id", user_id)
+
+    @classmethod
+    async def get_row_by_email(cls, session: AsyncSession, email: str) -> Optional[Row]:
+        """`get_row_by_id` by email."""
+        return await cls._fetch_row(session, "email", email)
+
+    @classmethod
+    async def batch_lookup(cls, session: AsyncSession, ids: Sequence[UUID] = (), emails: Sequence[str] = ()) -> Tuple[List[Row], List[str]]:
+        """
+        Resolve many ids and emails with one `WHERE id = ANY(:ids) OR email = ANY(:emails)` query.
+
+        Returns the found users as USER_RESPONSE_COLUMNS rows, in request order (ids first, then
+        emails, each user once), and the requested ids and emails that matched nobody.
+        """
+        ids, emails = list(dict.fromkeys(ids)), list(dict.fromkeys(emails))
+        conditions = []
+        if ids:
+            conditions.append(User.id == any_(bindparam("ids", ids, type_=ARRAY(PG_UUID(as_uuid=True)))))
+        if emails:
+            conditions.append(User.email == any_(bindparam("emails", emails, type_=ARRAY(String))))
+        if not conditions:
+            return [], []
+        result = await session.execute(select(*USER_RESPONSE_COLUMNS).where(or_(*conditions)))
+        rows = result.all()
+        by_id = {row.id: row for row in rows}
+        by_email = {row.email: row for row in rows}
+        found, not_found, seen = [], [], set()
+        for key, index in [(key, by_id) for key in ids] + [(key, by_email) for key in emails]:
+            row = index.get(key)
+            if row is None:
+                not_found.append(str(key))
+            elif row.id not in seen:
+                seen.add(row.id)
+                found.append(row)
+        return found, not_found
 
     @classmethod
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
-        return await cls._fetch_user(session, email=email)
+        return await cls._fetch_user(session, "email", email)
 
     @classmethod
     async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[User]:
-        return await cls._fetch_user(session, nickname=nickname)
+        return await cls._fetch_user(session, "nickname", nickname)
 
     @classmethod
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
+        outcome, user = await cls.register_account(session, user_data, email_service)
+        return user if outcome is RegistrationOutcome.CREATED else None
+
+    @classmethod
+    async def register_account(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Tuple[RegistrationOutcome, Optional[User]]:
+        """
+        Create a user with a single INSERT and COMMIT, whatever the size of the table.
+
+        There is no email pre-check: the unique email index rejects duplicates and the
+        transaction is rolled back. The first user ever becomes a verified ADMIN; that is
+        decided inside the INSERT by an EXISTS probe, which stops at the first row it finds
+        instead of counting them all.
+
+        With `settings.registration_group_commit` the row is instead handed to
+        `registration_group_commit`, which writes concurrent signups together through
+        `insert_registrations` in a transaction of its own.
+        """
         try:
             validated_data = UserCreate(**user_data).model_dump()
-            if await cls.get_by_email(session, validated_data["email"]):
-                logger.error("User with this email already exists.")
-                return None
+        except ValidationError as e:
+            logger.error(f"Validation error: {e}")
+            return RegistrationOutcome.INVALID, None
 
-            validated_data["hashed_password"] = hash_password(validated_data.pop("password"))
-            new_user = User(**validated_data)
-            nickname = generate_nickname()
-            while await cls.get_by_nickname(session, nickname):
-                nickname = generate_nickname()
-            new_user.nickname = nickname
+        validated_data["hashed_password"] = await get_hashing_service().hash(validated_data.pop("password"), HashPriority.REGISTRATION)
+        if settings.registration_group_commit:
+            outcome, new_user = await registration_group_commit.submit(validated_data)
+        else:
+            outcome, new_user = await cls._register_one(session, validated_data)
+        if outcome is not RegistrationOutcome.CREATED:
+            return outcome, None
+        user_count_cache.clear()
+        if new_user.role != UserRole.ADMIN:
+            # Sent once the row exists, so the link carries the real user id
+            await email_service.send_verification_email(new_user)
+        return RegistrationOutcome.CREATED, new_user
 
-            count = await cls.count(session)
-            new_user.role = UserRole.ADMIN if count == 0 else UserRole.ANONYMOUS
+    @staticmethod
+    def _account_values(validated_data: Dict[str, Any], may_be_first: bool = True) -> Dict[str, Any]:
+        """
+        Add role, email_verified and verification_token to the values of a new user. When
+        `may_be_first`, an EXISTS probe inside the INSERT decides whether this is the first user
+        ever, who becomes a verified ADMIN.
+        """
+        if not may_be_first:
+            return {**validated_data, "role": UserRole.ANONYMOUS, "email_verified": False, "verification_token": generate_verification_token()}
+        is_first_user = ~exists(select(User.id))
+        return {
+            **validated_data,
+            "role": case((is_first_user, cast(UserRole.ADMIN, User.role.type)), else_=cast(UserRole.ANONYMOUS, User.role.type)),
+            "email_verified": is_first_user,
+            "verification_token": case((is_first_user, None), else_=generate_verification_token()),
+        }
 
-            if new_user.role == UserRole.ADMIN:
-                new_user.email_verified = True
-            else:
-                new_user.verification_token = generate_verification_token()
-                await email_service.send_verification_email(new_user)
+    @classmethod
+    async def _register_one(cls, session: AsyncSession, validated_data: Dict[str, Any]) -> Tuple[RegistrationOutcome, Optional[User]]:
+        # Email conflicts are left to raise rather than go through ON CONFLICT: a taken email
+        # then costs the failed INSERT and a ROLLBACK, with no follow-up SELECT to tell an
+        # email conflict from a nickname one.
+        try:
+            new_user = await cls._insert_with_unique_nickname(session, cls._account_values(validated_data))
+        except IntegrityError as e:
+            await session.rollback()
+            if _violated_unique_constraint(e) == _EMAIL_UNIQUE_INDEX:
+                logger.error("User with this email already exists.")
+                return RegistrationOutcome.EMAIL_TAKEN, None
+            raise
+        if new_user is None:
+            await session.rollback()
+            return RegistrationOutcome.FAILED, None
+        await session.commit()
+        return RegistrationOutcome.CREATED, new_user
+
+    @classmethod
+    async def insert_registrations(cls, session: AsyncSession, batch: List[Dict[str, Any]]) -> List[Tuple[RegistrationOutcome, Optional[User]]]:
+        """
+        Insert a group of new users with one multi-row `INSERT ... ON CONFLICT DO NOTHING
+        RETURNING` and a single COMMIT, returning an outcome per row in order.
 
-            session.add(new_user)
+        Rows the INSERT skipped are looked up by email in one query: a row whose email now
+        exists (in the table or earlier in the same batch) is EMAIL_TAKEN, any other row lost
+        its nickname and is tried again under a new one. Only the first row of a batch can
+        become the first ADMIN, since every row's EXISTS probe sees the table as it was
+        before the statement.
+        """
+        rows = [{**cls._account_values(data, may_be_first=index == 0), "id": uuid4()} for index, data in enumerate(batch)]
+        results: List[Optional[Tuple[RegistrationOutcome, Optional[User]]]] = [None] * len(rows)
+        waiting = list(range(len(rows)))
+        try:
+            for _ in range(settings.nickname_max_attempts):
+                if not waiting:
+                    break
+                statement = (
+                    pg_insert(User)
+                    .values([{**rows[index], "nickname": generate_nickname()} for index in waiting])
+                    .on_conflict_do_nothing()
+                    .returning(User)
+                )
+                inserted = {user.id: user for user in (await session.scalars(statement)).all()}
+                skipped = []
+                for index in waiting:
+                    if rows[index]["id"] in inserted:
+                        results[index] = (RegistrationOutcome.CREATED, inserted[rows[index]["id"]])
+                    else:
+                        skipped.append(index)
+                if skipped:
+                    emails = [rows[index]["email"] for index in skipped]
+                    taken = set(await session.scalars(select(User.email).where(User.email == any_(bindparam("emails", emails, type_=ARRAY(String))))))
+                    for index in skipped:
+                        if rows[index]["email"] in taken:
+                            results[index] = (RegistrationOutcome.EMAIL_TAKEN, None)
+                waiting = [index for index in skipped if results[index] is None]
             await session.commit()
-            return new_user
-        except ValidationError as e:
-            logger.error(f"Validation error: {e}")
-            return None
+        except SQLAlchemyError:
+            await session.rollback()
+            raise
+        if waiting:
+            logger.error(f"No free nickname found for {len(waiting)} registrations after {settings.nickname_max_attempts} attempts.")
+        return [result or (RegistrationOutcome.FAILED, None) for result in results]
+
+    @classmethod
+    async def _write_registration_batch(cls, batch: List[Dict[str, Any]]) -> List[Tuple[RegistrationOutcome, Optional[User]]]:
+        async with Database.get_session_factory()() as session:
+            return await cls.insert_registrations(session, batch)
 
     @classmethod
-    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
+    async def _insert_with_unique_nickname(cls, session: AsyncSession, values: Dict[str, Any]) -> Optional[User]:
+        """
+        INSERT the user under a freshly generated nickname with ON CONFLICT (nickname) DO NOTHING,
+        retrying with a new nickname when the unique index rejects it. With a namespace of
+        billions a collision is rare, so this is one round trip instead of a SELECT per attempt.
+        """
+        for _ in range(settings.nickname_max_attempts):
+            statement = (
+                pg_insert(User)
+                .values(**{**values, "nickname": generate_nickname()})
+                .on_conflict_do_nothing(index_elements=[User.nickname])
+                .returning(User)
+            )
+            user = (await session.scalars(statement)).first()
+            if user is not None:
+                return user
+        logger.error(f"No free nickname found after {settings.nickname_max_attempts} attempts.")
+        return None
+
+    @classmethod
+    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[Row]:
+        """
+        Apply `update_data` with one `UPDATE ... RETURNING` and return the updated user as a row
+        of USER_RESPONSE_COLUMNS, or None when the data is invalid or the user does not exist.
+        Raises UniqueFieldTakenError when another user already has the new email or nickname;
+        other database errors are rolled back and raised.
+        """
         try:
             # ✅ Catch invalid emails and other bad fields
             validated_data = UserUpdate(**update_data).model_dump(exclude_unset=True)
-
-            if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            return await cls.get_by_id(session, user_id)
-        except Exception as e:
+        except ValidationError as e:
             logger.error(f"Update error: {e}")
             return None
 
+        if 'password' in validated_data:
+            validated_data['hashed_password'] = await get_hashing_service().hash(validated_data.pop('password'), HashPriority.REGISTRATION)
+        if not validated_data:
+            return await cls.get_row_by_id(session, user_id)
+        query = update(User).where(User.id == user_id).values(**validated_data).returning(*USER_RESPONSE_COLUMNS)
+        try:
+            row = (await session.execute(query)).first()
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            field = _UNIQUE_INDEX_FIELDS.get(_violated_unique_constraint(e))
+            if field is None:
+                raise
+            raise UniqueFieldTakenError(field) from e
+        except SQLAlchemyError:
+            await session.rollback()
+            raise
+        if row is not None:
+            await user_cache.invalidate(row.id)
+        return row
+
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if not user:
+        """Delete the user with one `DELETE ... RETURNING id`; False when there was no such user."""
+        result = await cls._execute_query(session, delete(User).where(User.id == user_id).returning(User.id), commit=True)
+        if result is None or result.first() is None:
             return False
-        await session.delete(user)
-        await session.commit()
+        user_count_cache.clear()
+        await user_cache.invalidate(user_id)
         return True
 
     @classmethod
-    async def count(cls, session: AsyncSession) -> int:
-        result = await session.execute(select(func.count()).select_from(User))
-        return result.scalar()
+    async def bulk_apply(cls, session: AsyncSession, action: UserBulkAction, ids: Optional[Sequence[UUID]] = None,
+                         conditions: Sequence[Any] = (), role: Optional[UserRole] = None) -> Optional[List[Row]]:
+        """
+        Apply `action` to the users in `ids`, or else to every user matching `conditions`, with a
+        single `UPDATE/DELETE ... WHERE id = ANY(:ids) RETURNING` and one COMMIT.
+
+        Returns the changed users as (id, email, first_name) rows, in request order when `ids`
+        is given; requested ids missing from it matched nobody the action applies to (an upgrade
+        skips users who are already professional). None when the database rejects the statement.
+        """
+        if ids is not None:
+            ids = list(dict.fromkeys(ids))
+            where = [User.id == any_(bindparam("ids", ids, type_=ARRAY(PG_UUID(as_uuid=True))))]
+        else:
+            where = list(conditions)
+        if action is UserBulkAction.UPGRADE:
+            # Users who are already professional keep their upgrade date and get no second email
+            where.append(User.is_professional.is_not(True))
+        if action is UserBulkAction.DELETE:
+            statement = delete(User)
+        else:
+            values = {
+                UserBulkAction.UPGRADE: {"is_professional": True, "professional_status_updated_at": datetime.now(timezone.utc)},
+                UserBulkAction.LOCK: {"is_locked": True},
+                UserBulkAction.UNLOCK: {"is_locked": False, "failed_login_attempts": 0},
+                UserBulkAction.SET_ROLE: {"role": role},
+            }[action]
+            statement = update(User).values(**values)
+        result = await cls._execute_query(session, statement.where(*where).returning(User.id, User.email, User.first_name), commit=True)
+        if result is None:
+            return None
+        rows = result.all()
+        if action is UserBulkAction.DELETE and rows:
+            user_count_cache.clear()
+        await user_cache.invalidate(*(row.id for row in rows))
+        if ids is None:
+            return rows
+        by_id = {row.id: row for row in rows}
+        return [by_id[user_id] for user_id in ids if user_id in by_id]
+
+    @classmethod
+    async def send_professional_upgrade_emails(cls, email_service: EmailService, users: Sequence[Row]):
+        """Send the professional upgrade email to each (email, first_name) row; failures are logged and skipped."""
+        for user in users:
+            try:
+                await email_service.send_user_email({"name": user.first_name, "email": str(user.email)}, "professional_upgrade")
+            except Exception as e:
+                logger.error(f"[EMAIL ERROR] Failed to send professional upgrade email to {user.email}: {e}")
+
+    @classmethod
+    async def count(cls, session: AsyncSession, mode: CountMode = CountMode.EXACT) -> int:
+        """
+        Number of users. EXACT runs count(*), which scans the whole table. ESTIMATED reads the
+        planner's row estimate from pg_class and only counts exactly when the table is small or
+        has never been analyzed. CACHED reuses an exact count for up to user_count_cache_ttl
+        seconds; creating or deleting a user in this process drops it.
+        """
+        if mode is CountMode.ESTIMATED:
+            result = await session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": User.__tablename__},
+            )
+            estimate = result.scalar()
+            if estimate is not None and estimate >= settings.user_count_estimate_min_rows:
+                return estimate
+        elif mode is CountMode.CACHED:
+            cached = user_count_cache.get("users")
+            if cached is not None:
+                return cached
+        result = await session.execute(_USER_COUNT)
+        total = result.scalar()
+        if mode is CountMode.CACHED:
+            user_count_cache.set("users", total)
+        return total
 
     @classmethod
     async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
+        query = select(User).order_by(User.created_at, User.id).offset(skip).limit(limit)
         result = await session.execute(query)
         return result.scalars().all()
 
+    @classmethod
+    async def list_users_page(cls, session: AsyncSession, limit: int = 10, cursor: Optional[str] = None, conditions: Sequence[Any] = ()) -> Tuple[List[Row], bool, bool]:
+        """
+        One page of the users matching `conditions` in (created_at, id) order, starting from an
+        opaque cursor. Users come back as read-only rows of USER_RESPONSE_COLUMNS.
+
+        The cursor turns into a row comparison on the (created_at, id) index, so every page
+        costs the same however deep it is. Returns the users plus whether there are pages
+        after and before them. Raises ValueError for a malformed cursor.
+        """
+        params = {"limit": limit + 1}
+        direction = None
+        if cursor is not None:
+            params["created_at"], params["user_id"], direction = decode_cursor(cursor)
+        query = _USER_PAGE[direction]
+        if conditions:
+            query = query.where(*conditions)
+        backwards = direction == PREV
+        result = await session.execute(query, params)
+        users = result.all()
+        has_more = len(users) > limit
+        users = users[:limit]
+        if backwards:
+            return users[::-1], cursor is not None, has_more
+        return users, has_more, cursor is not None
+
+    @classmethod
+    def filter_conditions(cls, role: Optional[UserRole] = None, is_locked: Optional[bool] = None, email_verified: Optional[bool] = None,
+                          is_professional: Optional[bool] = None, created_after: Optional[datetime] = None, created_before: Optional[datetime] = None) -> List[Any]:
+        """WHERE conditions for the given filters; None means "don't filter on this"."""
+        conditions = []
+        for column, value in ((User.role, role), (User.is_locked, is_locked), (User.email_verified, email_verified), (User.is_professional, is_professional)):
+            if value is not None:
+                conditions.append(column == value)
+        if created_after is not None:
+            conditions.append(User.created_at >= created_after)
+        if created_before is not None:
+            conditions.append(User.created_at < created_before)
+        return conditions
+
+    @classmethod
+    def search_conditions(cls, q: Optional[str] = None, **filters) -> List[Any]:
+        """
+        `filter_conditions` plus a case-insensitive substring match of `q` against nickname, email,
+        first and last name. The match is an ILIKE '%q%', which the trigram indexes serve.
+        """
+        conditions = cls.filter_conditions(**filters)
+        if q:
+            pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append(or_(*(column.ilike(pattern, escape="\\") for column in (User.nickname, User.email, User.first_name, User.last_name))))
+        return conditions
+
+    @classmethod
+    async def stream_rows(cls, session: AsyncSession, columns: Sequence[str], **filters) -> AsyncIterator[Row]:
+        """
+        Rows of the named EXPORTABLE_COLUMNS for every user matching `filters`, in (created_at, id)
+        order. Rows are read through a server-side cursor `user_export_batch_size` at a time, so
+        memory stays flat however many users there are.
+        """
+        query = (
+            select(*(EXPORTABLE_COLUMNS[name] for name in columns))
+            .where(*cls.filter_conditions(**filters))
+            .order_by(User.created_at, User.id)
+            .execution_options(yield_per=settings.user_export_batch_size)
+        )
+        result = await session.stream(query)
+        async for row in result:
+            yield row
+
+    @classmethod
+    async def authenticate(cls, session: AsyncSession, email: str, password: str, commit: bool = True) -> Tuple[LoginOutcome, Optional[User]]:
+        """
+        Load the user once, verify the password and record the attempt with a single UPDATE.
+
+        Failed attempts are incremented and the lockout decided inside the database, so
+        concurrent logins cannot lose increments. A successful login only resets the counter of
+        an account that is still unlocked: one locked by a concurrent failed attempt after it was
+        loaded is reported as LOCKED. With commit=False a successful login leaves its transaction
+        open so the caller can add to it (e.g. issue a refresh token) and commit once, then call
+        `invalidate_committed`; failed attempts are always committed.
+        """
+        result = await session.execute(_USER_BY["email"], {"email": email})
+        user = result.scalars().first()
+        if user is None:
+            return LoginOutcome.INVALID_CREDENTIALS, None
+        if user.is_locked:
+            return LoginOutcome.LOCKED, user
+
+        if user.email_verified and await get_hashing_service().verify(password, user.hashed_password, HashPriority.LOGIN):
+            values = {"failed_login_attempts": 0, "last_login_at": datetime.now(timezone.utc)}
+            if password_needs_rehash(user.hashed_password):
+                try:
+                    values["hashed_password"] = await get_hashing_service().hash(password, HashPriority.LOGIN)
+                except HashingQueueFullError:
+                    logger.warning(f"Skipping password rehash for {user.email}, hashing queue is full.")
+            deferred = settings.login_write_behind and not user.failed_login_attempts and "hashed_password" not in values
+            if deferred:
+                # Nothing but the timestamp changes, which no lockout decision depends on; only
+                # check the account was not locked while the password was being verified
+                row = (await session.execute(select(User.is_locked).where(User.id == user.id))).first()
+                if row is None:
+                    return LoginOutcome.INVALID_CREDENTIALS, None
+                if row.is_locked:
+                    return LoginOutcome.LOCKED, user
+                login_activity_buffer.record(user.id, values["last_login_at"])
+            else:
+                result = await session.execute(
+                    update(User)
+                    .where(User.id == user.id, User.is_locked.is_not(True))
+                    .values(**values)
+                    .returning(User.id)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.first() is None:
+                    return LoginOutcome.LOCKED, user
+            for key, value in values.items():
+                set_committed_value(user, key, value)
+            if not deferred:
+                session.info.setdefault("stale_user_ids", set()).add(user.id)
+            if commit:
+                await session.commit()
+                await cls.invalidate_committed(session)
+            return LoginOutcome.SUCCESS, user
+
+        attempts = func.coalesce(User.failed_login_attempts, 0) + 1
+        result = await session.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                failed_login_attempts=attempts,
+                is_locked=or_(func.coalesce(User.is_locked, False), attempts >= settings.max_login_attempts),
+            )
+            .returning(User.failed_login_attempts, User.is_locked)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        await session.commit()
+        if row is None:
+            # Deleted since it was loaded
+            return LoginOutcome.INVALID_CREDENTIALS, None
+        set_committed_value(user, "failed_login_attempts", row.failed_login_attempts)
+        set_committed_value(user, "is_locked", row.is_locked)
+        await user_cache.invalidate(user.id)
+        return LoginOutcome.INVALID_CREDENTIALS, user
+
+    @classmethod
+    async def invalidate_committed(cls, session: AsyncSession):
+        """Drop from user_cache the users `session` changed without committing; call after its commit."""
+        user_ids = session.info.pop("stale_user_ids", None)
+        if user_ids:
+            await user_cache.invalidate(*user_ids)
+
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user and user.email_verified and not user.is_locked and verify_password(password, user.hashed_password):
-            user.failed_login_attempts = 0
-            user.last_login_at = datetime.now(timezone.utc)
-            session.add(user)
-            await session.commit()
-            return user
-        elif user:
-            user.failed_login_attempts += 1
-            if user.failed_login_attempts >= settings.max_login_attempts:
-                user.is_locked = True
-            session.add(user)
-            await session.commit()
-        return None
+        outcome, user = await cls.authenticate(session, email, password)
+        return user if outcome is LoginOutcome.SUCCESS else None
 
     @classmethod
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
-        user = await cls.get_by_email(session, email)
-        return user.is_locked if user else False
+        result = await session.execute(select(User.is_locked).where(User.email == email))
+        return bool(result.scalar())
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
         user = await cls.get_by_id(session, user_id)
         if user:
-            user.hashed_password = hash_password(new_password)
+            user.hashed_password = await get_hashing_service().hash(new_password, HashPriority.REGISTRATION)
             user.failed_login_attempts = 0
             user.is_locked = False
             session.add(user)
             await session.commit()
+            await user_cache.invalidate(user_id)
             return True
         return False
 
@@ -157,6 +638,7 @@ class UserService:
             user.role = UserRole.AUTHENTICATED
             session.add(user)
             await session.commit()
+            await user_cache.invalidate(user.id)
             return True
         return False
 
@@ -177,6 +659,7 @@ class UserService:
         user.professional_status_updated_at = datetime.now(timezone.utc)
         session.add(user)
         await session.commit()
+        await user_cache.invalidate(user.id)
         logger.info(f"[UPGRADE] User {user.email} upgraded to professional.")
 
         try:
@@ -189,3 +672,10 @@ class UserService:
             logger.error(f"[EMAIL ERROR] Failed to send professional upgrade email: {e}")
 
         return user
+
+# Opt-in group commit for registration bursts (settings.registration_group_commit)
+registration_group_commit = GroupCommit(
+    UserService._write_registration_batch,
+    window=settings.registration_group_commit_window,
+    max_batch=settings.registration_group_commit_max_batch,
+)
@@ -0,0 +1,31 @@
+# app/utils/cursor.py
+from builtins import ValueError, str
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+NEXT = "next"
+PREV = "prev"
+
+
+def encode_cursor(created_at: datetime, user_id: UUID, direction: str = NEXT) -> str:
+    """
+    Opaque keyset cursor pointing just after (NEXT) or just before (PREV) the row
+    with the given (created_at, id).
+    """
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(user_id), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID, str]:
+    """Inverse of `encode_cursor`. Raises ValueError for anything that is not a cursor we issued."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(f"Unknown cursor direction {direction!r}")
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"]), direction
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
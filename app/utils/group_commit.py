@@ -0,0 +1,79 @@
+# app/utils/group_commit.py
+from builtins import Exception, len, list, zip
+from typing import Awaitable, Callable, Generic, List, Optional, Set, Tuple, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class GroupCommit(Generic[T, R]):
+    """
+    Coalesce items submitted by concurrent requests into batches for one write each.
+
+    The first item to arrive opens a window of `window` seconds; everything submitted until it
+    closes, or until `max_batch` items are waiting, goes to `write_batch` together. `write_batch`
+    must return one result per item, in order, and each submitter gets its own result back.
+    If the whole batch fails, every submitter gets the exception.
+    """
+
+    def __init__(self, write_batch: Callable[[List[T]], Awaitable[List[R]]], window: float, max_batch: int):
+        self.write_batch = write_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+        self._stats = {"submitted": 0, "batches": 0, "largest_batch": 0, "errors": 0}
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self._stats["submitted"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._start_write()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._start_write)
+        return await future
+
+    def _start_write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[Tuple[T, asyncio.Future]]):
+        self._stats["batches"] += 1
+        if len(batch) > self._stats["largest_batch"]:
+            self._stats["largest_batch"] = len(batch)
+        try:
+            results = await self.write_batch([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Group write of {len(batch)} items failed: {e}")
+            self._stats["errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # A submitter that gave up (request cancelled) still had its item written
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def stop(self):
+        """Write whatever is still waiting and wait for writes in flight."""
+        self._start_write()
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    def metrics(self) -> dict:
+        return {"pending": len(self._pending), "in_flight": len(self._writes), **self._stats}
@@ -1,20 +1,21 @@
-from builtins import dict, int, max, str
-from typing import List, Callable
-from urllib.parse import urlencode
+from builtins import bool, dict, int, str
+from typing import Any, List, Sequence
 from uuid import UUID
 
 from fastapi import Request
 from app.schemas.link_schema import Link
 from app.schemas.pagination_schema import PaginationLink
+from app.utils.cursor import NEXT, PREV, encode_cursor
 
 # Utility function to create a link
 def create_link(rel: str, href: str, method: str = "GET", action: str = None) -> Link:
     return Link(rel=rel, href=href, method=method, action=action)
 
-def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
-    # Ensure parameters are added in a specific order
-    query_string = f"skip={params['skip']}&limit={params['limit']}"
-    return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
+def create_pagination_link(rel: str, request: Request, params: dict) -> PaginationLink:
+    # Keep the request's other query parameters; a None value drops the parameter
+    url = request.url.remove_query_params([key for key, value in params.items() if value is None])
+    url = url.include_query_params(**{key: value for key, value in params.items() if value is not None})
+    return PaginationLink(rel=rel, href=str(url))
 
 def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     """
@@ -30,19 +31,22 @@ def create_user_links(user_id: UUID, request: Request) -> List[Link]:
         for rel, action, method, action_desc in actions
     ]
 
-def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int) -> List[PaginationLink]:
-    base_url = str(request.url)
-    total_pages = (total_items + limit - 1) // limit
+def generate_pagination_links(request: Request, items: Sequence[Any], limit: int, has_next: bool, has_prev: bool) -> List[PaginationLink]:
+    """
+    Cursor links for a page of items ordered by (created_at, id). `next` starts after the
+    last item and `prev` ends before the first one.
+    """
     links = [
-        create_pagination_link("self", base_url, {'skip': skip, 'limit': limit}),
-        create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}),
-        create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit})
+        create_pagination_link("self", request, {'limit': limit}),
+        create_pagination_link("first", request, {'cursor': None, 'limit': limit}),
     ]
 
-    if skip + limit < total_items:
-        links.append(create_pagination_link("next", base_url, {'skip': skip + limit, 'limit': limit}))
+    if has_next and items:
+        last = items[-1]
+        links.append(create_pagination_link("next", request, {'cursor': encode_cursor(last.created_at, last.id, NEXT), 'limit': limit}))
 
-    if skip > 0:
-        links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
+    if has_prev and items:
+        first = items[0]
+        links.append(create_pagination_link("prev", request, {'cursor': encode_cursor(first.created_at, first.id, PREV), 'limit': limit}))
 
     return links
@@ -1,10 +1,28 @@
-from builtins import str
+from builtins import len, str
 import random
 
+ADJECTIVES = (
+    "clever", "jolly", "brave", "sly", "gentle", "bold", "calm", "eager", "fancy", "happy",
+    "kind", "lively", "proud", "quick", "quiet", "witty", "zesty", "agile", "bright", "cheerful",
+    "curious", "daring", "fearless", "friendly", "graceful", "humble", "keen", "loyal", "merry", "mighty",
+    "nimble", "patient", "playful", "polite", "rapid", "sharp", "shiny", "silent", "smart", "snappy",
+    "steady", "sunny", "swift", "tidy", "upbeat", "vivid", "wise", "young",
+)
+ANIMALS = (
+    "panda", "fox", "raccoon", "koala", "lion", "badger", "beaver", "bison", "camel", "cheetah",
+    "cobra", "crane", "dolphin", "eagle", "falcon", "ferret", "gecko", "giraffe", "hawk", "hedgehog",
+    "heron", "ibex", "jaguar", "kestrel", "lemur", "leopard", "lynx", "marmot", "moose", "narwhal",
+    "ocelot", "otter", "owl", "panther", "parrot", "pelican", "penguin", "puffin", "quokka", "rabbit",
+    "salmon", "seal", "sparrow", "tiger", "turtle", "walrus", "wolf", "zebra",
+)
+NUMBER_RANGE = 1_000_000
+
+# 48 * 48 * 1,000,000 = 2.3 billion nicknames, so random picks practically never collide
+NAMESPACE_SIZE = len(ADJECTIVES) * len(ANIMALS) * NUMBER_RANGE
+
+_random = random.SystemRandom()
+
 
 def generate_nickname() -> str:
     """Generate a URL-safe nickname using adjectives and animal names."""
-    adjectives = ["clever", "jolly", "brave", "sly", "gentle"]
-    animals = ["panda", "fox", "raccoon", "koala", "lion"]
-    number = random.randint(0, 999)
-    return f"{random.choice(adjectives)}_{random.choice(animals)}_{number}"
+    return f"{_random.choice(ADJECTIVES)}_{_random.choice(ANIMALS)}_{_random.randrange(NUMBER_RANGE)}"
@@ -0,0 +1,197 @@
+# app/utils/password_hashers.py
+from builtins import Exception, ValueError, bool, dict, int, str
+import argparse
+import time
+from abc import ABC, abstractmethod
+from logging import getLogger
+from typing import Callable, Dict, Optional
+
+from app.utils.security import hash_password, verify_password
+from settings.config import settings
+
+logger = getLogger(__name__)
+
+
+class PasswordHasher(ABC):
+    """Base class for the password hashing algorithms the application understands."""
+    algorithm: str = ""
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        ...
+
+    @abstractmethod
+    def verify(self, password: str, hashed_password: str) -> bool:
+        ...
+
+    @abstractmethod
+    def identify(self, hashed_password: str) -> bool:
+        """Return True if `hashed_password` was produced by this algorithm."""
+
+    @abstractmethod
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Return True if `hashed_password` was produced with different parameters than this hasher's."""
+
+
+class BcryptHasher(PasswordHasher):
+    algorithm = "bcrypt"
+    prefixes = ("$2a$", "$2b$", "$2y$")
+
+    def __init__(self, rounds: int = 12):
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        return hash_password(password, rounds=self.rounds)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return verify_password(password, hashed_password)
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(self.prefixes)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+class Argon2idHasher(PasswordHasher):
+    algorithm = "argon2id"
+    prefix = "$argon2id$"
+
+    def __init__(self, time_cost: int = 3, memory_cost: int = 65536, parallelism: int = 4):
+        # Imported here so deployments that only use bcrypt do not need argon2-cffi.
+        from argon2 import PasswordHasher as Argon2PasswordHasher
+
+        self.time_cost = time_cost
+        self.memory_cost = memory_cost
+        self.parallelism = parallelism
+        self._hasher = Argon2PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+    def hash(self, password: str) -> str:
+        try:
+            return self._hasher.hash(password)
+        except Exception as e:
+            logger.error("Failed to hash password: %s", e)
+            raise ValueError("Failed to hash password") from e
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        from argon2.exceptions import VerificationError, InvalidHashError
+
+        try:
+            return self._hasher.verify(hashed_password, password)
+        except VerificationError:
+            return False
+        except InvalidHashError as e:
+            logger.error("Error verifying password: %s", e)
+            raise ValueError("Authentication process encountered an unexpected error") from e
+
+    def identify(self, hashed_password: str) -> bool:
+        return hashed_password.startswith(self.prefix)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return self._hasher.check_needs_rehash(hashed_password)
+
+
+_HASHER_FACTORIES: Dict[str, Callable[[], PasswordHasher]] = {
+    "bcrypt": lambda: BcryptHasher(rounds=settings.bcrypt_rounds),
+    "argon2id": lambda: Argon2idHasher(
+        time_cost=settings.argon2_time_cost,
+        memory_cost=settings.argon2_memory_cost,
+        parallelism=settings.argon2_parallelism,
+    ),
+}
+_hashers: Dict[str, PasswordHasher] = {}
+
+
+def register_hasher(algorithm: str, factory: Callable[[], PasswordHasher]):
+    """Register (or replace) the factory that builds the hasher for `algorithm`."""
+    _HASHER_FACTORIES[algorithm] = factory
+    _hashers.pop(algorithm, None)
+
+
+def get_hasher(algorithm: Optional[str] = None) -> PasswordHasher:
+    """Return the configured hasher for `algorithm`, defaulting to `settings.password_hasher`."""
+    algorithm = algorithm or settings.password_hasher
+    if algorithm not in _hashers:
+        if algorithm not in _HASHER_FACTORIES:
+            raise ValueError(f"Unknown password hashing algorithm: {algorithm}")
+        _hashers[algorithm] = _HASHER_FACTORIES[algorithm]()
+    return _hashers[algorithm]
+
+
+def identify_hasher(hashed_password: str) -> PasswordHasher:
+    """Return the hasher that produced `hashed_password`."""
+    for algorithm in _HASHER_FACTORIES:
+        hasher = get_hasher(algorithm)
+        if hasher.identify(hashed_password):
+            return hasher
+    raise ValueError("Unrecognised password hash format")
+
+
+def make_password(password: str, hasher: Optional[PasswordHasher] = None) -> str:
+    """Hash `password` with `hasher`, or with the configured default hasher."""
+    return (hasher or get_hasher()).hash(password)
+
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """Verify `password` against a hash produced by any registered algorithm."""
+    return identify_hasher(hashed_password).verify(password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Return True if `hashed_password` does not use the current default algorithm and cost."""
+    hasher = get_hasher()
+    return not hasher.identify(hashed_password) or hasher.needs_rehash(hashed_password)
+
+
+def _time_hash(hasher: PasswordHasher, samples: int = 3) -> float:
+    best = None
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration-Password$1")
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def calibrate(algorithm: str, target_ms: float) -> dict:
+    """
+    Find the highest cost for `algorithm` whose hash time on this host stays within `target_ms`.
+
+    For bcrypt the cost is the number of rounds, for argon2id it is the time cost
+    (iterations) at the configured memory cost and parallelism.
+    """
+    if algorithm == "bcrypt":
+        chosen = {"bcrypt_rounds": 4, "ms": _time_hash(BcryptHasher(rounds=4))}
+        for rounds in range(5, 32):
+            elapsed = _time_hash(BcryptHasher(rounds=rounds))
+            if elapsed > target_ms:
+                break
+            chosen = {"bcrypt_rounds": rounds, "ms": elapsed}
+        return chosen
+    if algorithm == "argon2id":
+        def build(time_cost):
+            return Argon2idHasher(time_cost=time_cost, memory_cost=settings.argon2_memory_cost, parallelism=settings.argon2_parallelism)
+
+        chosen = {"argon2_time_cost": 1, "ms": _time_hash(build(1))}
+        for time_cost in range(2, 100):
+            elapsed = _time_hash(build(time_cost))
+            if elapsed > target_ms:
+                break
+            chosen = {"argon2_time_cost": time_cost, "ms": elapsed}
+        return chosen
+    raise ValueError(f"Calibration is not supported for {algorithm}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the password hashing cost that meets a per-hash latency target on this host.")
+    parser.add_argument("--algorithm", default=settings.password_hasher, choices=["bcrypt", "argon2id"])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Maximum time a single hash may take, in milliseconds")
+    args = parser.parse_args()
+
+    result = calibrate(args.algorithm, args.target_ms)
+    elapsed = result.pop("ms")
+    for name, value in result.items():
+        print(f"{name.upper()}={value}  # {elapsed:.1f} ms per hash (target {args.target_ms:.0f} ms)")
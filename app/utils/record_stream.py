@@ -0,0 +1,162 @@
+# app/utils/record_stream.py
+from builtins import BaseException, ValueError, bytes, dict, int, isinstance, str, zip
+import asyncio
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+DEFAULT_MAX_LINE_LENGTH = 65536
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> AsyncIterator[Optional[str]]:
+    """
+    Split a stream of byte chunks into decoded lines, holding at most one partial line in memory.
+    A line longer than `max_line_length` bytes is dropped as it arrives and yielded as None.
+    """
+    pending = b""
+    skipping = False
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if skipping or len(line) > max_line_length:
+                skipping = False
+                yield None
+            else:
+                yield line.rstrip(b"\r").decode("utf-8")
+        if len(pending) > max_line_length:
+            pending = b""
+            skipping = True
+    if skipping:
+        yield None
+    elif pending:
+        yield pending.rstrip(b"\r").decode("utf-8")
+
+
+async def spool(chunks: AsyncIterator[bytes], max_memory: int) -> SpooledTemporaryFile:
+    """
+    Read a stream of byte chunks to the end into a temporary file that stays in memory up to
+    `max_memory` bytes and moves to disk beyond that. Returns the file rewound to the start.
+    """
+    spooled = SpooledTemporaryFile(max_size=max_memory)
+    try:
+        async for chunk in chunks:
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+async def iter_file_chunks(file: BinaryIO, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    """Yield the rest of `file` in chunks of at most `chunk_size` bytes, reading in a thread."""
+    while True:
+        # Once a spooled file has moved to disk, reads block; keep them off the event loop
+        chunk = await asyncio.to_thread(file.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes], max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> AsyncIterator[Record]:
+    """
+    Yield `(line_number, record, error)` for every non-blank line of an NDJSON stream.
+    Exactly one of `record` and `error` is set.
+    """
+    line_number = 0
+    async for line in iter_lines(chunks, max_line_length):
+        line_number += 1
+        if line is None:
+            yield line_number, None, f"Line longer than {max_line_length} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(record, dict):
+            yield line_number, record, None
+        else:
+            yield line_number, None, "Expected a JSON object"
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes], max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> AsyncIterator[Record]:
+    """
+    Yield `(line_number, record, error)` for every data row of a CSV stream whose first line is
+    the header. Empty cells become None. Each record must fit on one line; quoted newlines are
+    not supported.
+    """
+    header = None
+    line_number = 0
+    async for line in iter_lines(chunks, max_line_length):
+        line_number += 1
+        if line is None:
+            yield line_number, None, f"Line longer than {max_line_length} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = next(csv.reader([line]))
+        except csv.Error as e:
+            yield line_number, None, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) != len(header):
+            yield line_number, None, f"Expected {len(header)} columns, got {len(row)}"
+            continue
+        yield line_number, {name: value if value != "" else None for name, value in zip(header, row)}, None
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+async def iter_ndjson_lines(rows: AsyncIterator[Sequence], columns: List[str], flush_bytes: int = 65536) -> AsyncIterator[str]:
+    """
+    Serialize rows whose values line up with `columns` as one JSON object per line, yielding
+    the output in pieces of roughly `flush_bytes` rather than one write per row.
+    """
+    buffer = io.StringIO()
+    async for row in rows:
+        buffer.write(json.dumps({name: _plain(value) for name, value in zip(columns, row)}))
+        buffer.write("\n")
+        if buffer.tell() >= flush_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def iter_csv_lines(rows: AsyncIterator[Sequence], columns: List[str], flush_bytes: int = 65536) -> AsyncIterator[str]:
+    """Like `iter_ndjson_lines`, but as CSV with a header line first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        if buffer.tell() >= flush_bytes:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
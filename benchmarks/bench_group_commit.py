@@ -0,0 +1,56 @@
+"""
+Sustained signups per second: one INSERT and COMMIT per registration versus the registration
+group commit, which writes concurrent signups as one multi-row INSERT and COMMIT.
+
+`concurrency` registrations are kept in flight for `signups` in total. Passwords are hashed
+once up front, since hashing costs the same on both paths and would otherwise hide the
+database work. Needs a Postgres database at DATABASE_URL with the schema migrated; rows are
+added to the users table. Run from the repository root:
+
+    python -m benchmarks.bench_group_commit [signups] [concurrency]
+"""
+import asyncio
+import sys
+import time
+import uuid
+
+from app.database import Database
+from app.services.user_service import UserService
+from app.utils.group_commit import GroupCommit
+from app.utils.security import hash_password
+from settings.config import settings
+
+
+async def run(register, signups: int, concurrency: int) -> float:
+    tag = uuid.uuid4().hex[:8]
+    hashed_password = hash_password("ValidPassword123!")
+    queue = iter(range(signups))
+
+    async def worker():
+        for n in queue:
+            await register({"email": f"bench_{tag}_{n}@example.com", "nickname": None, "hashed_password": hashed_password})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return signups / (time.perf_counter() - started)
+
+
+async def main(signups: int = 5000, concurrency: int = 200):
+    Database.initialize(settings.database_url, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+    session_factory = Database.get_session_factory()
+
+    async def one_by_one(data):
+        async with session_factory() as session:
+            return await UserService._register_one(session, data)
+
+    group = GroupCommit(UserService._write_registration_batch, settings.registration_group_commit_window, settings.registration_group_commit_max_batch)
+    direct = await run(one_by_one, signups, concurrency)
+    grouped = await run(group.submit, signups, concurrency)
+    print(f"  one by one: {direct:9.1f} signups/s")
+    print(f"group commit: {grouped:9.1f} signups/s ({grouped / direct:.1f}x, {group.metrics()['batches']} batches, "
+          f"largest {group.metrics()['largest_batch']})")
+    await Database.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,50 @@
+"""
+Latency of one GET /users/ page (page query plus total) for each total mode.
+
+Needs a Postgres database at DATABASE_URL with the schema migrated. The users table is
+topped up to the requested number of rows with a single INSERT ... SELECT generate_series,
+so the first run at 1M rows takes a little while. Run from the repository root:
+
+    python -m benchmarks.bench_list_totals [rows] [iterations]
+"""
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.services.user_service import CountMode, UserService, user_count_cache
+from settings.config import settings
+
+
+async def seed(session: AsyncSession, rows: int):
+    existing = await UserService.count(session)
+    if existing < rows:
+        await session.execute(text(
+            "INSERT INTO users (id, nickname, email, hashed_password, role, email_verified, created_at) "
+            "SELECT gen_random_uuid(), 'bench_' || n, 'bench_' || n || '@example.com', 'x', CAST('AUTHENTICATED' AS \"UserRole\"), true, "
+            "now() - n * interval '1 second' FROM generate_series(:start, :stop) AS n"
+        ), {"start": existing + 1, "stop": rows})
+        await session.commit()
+    await session.execute(text("ANALYZE users"))
+
+
+async def main(rows: int = 1_000_000, iterations: int = 50):
+    engine = create_async_engine(settings.database_url)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await seed(session, rows)
+        for mode in CountMode:
+            user_count_cache.clear()
+            await UserService.count(session, mode)  # warm up, and fill the cache in cached mode
+            started = time.perf_counter()
+            for _ in range(iterations):
+                await UserService.list_users_page(session, limit=10)
+                total = await UserService.count(session, mode)
+            elapsed_ms = (time.perf_counter() - started) / iterations * 1e3
+            print(f"{mode.value:>9}: {elapsed_ms:8.2f} ms per page  (total={total}, {iterations} pages)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,42 @@
+"""
+Python-side SQL overhead per UserService hot query: statements built per call versus the
+prebuilt statements in app.services.user_service.
+
+Every execution first needs the statement object and its cache key, which SQLAlchemy then looks
+up in the compiled-SQL cache; a cache miss costs a full compile on top. This measures those
+steps without a database. Run from the repository root:
+
+    python -m benchmarks.bench_statement_cache [iterations]
+"""
+import sys
+import timeit
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.models.user_model import User
+from app.services.user_service import _USER_BY, _USER_COUNT, _USER_PAGE, USER_RESPONSE_COLUMNS
+
+
+def main(iterations: int = 20000):
+    user_id = uuid.uuid4()
+    built_per_call = {
+        "by id": lambda: select(User).filter_by(id=user_id),
+        "by email": lambda: select(User).filter_by(email="john.doe@example.com"),
+        "count": lambda: select(func.count()).select_from(User),
+        "list page": lambda: select(*USER_RESPONSE_COLUMNS).order_by(User.created_at, User.id).limit(11),
+    }
+    prebuilt = {"by id": _USER_BY["id"], "by email": _USER_BY["email"], "count": _USER_COUNT, "list page": _USER_PAGE[None]}
+    dialect = asyncpg_dialect()
+    for name, build in built_per_call.items():
+        before = timeit.timeit(lambda: build()._generate_cache_key(), number=iterations) / iterations * 1e6
+        statement = prebuilt[name]
+        after = timeit.timeit(lambda: statement._generate_cache_key(), number=iterations) / iterations * 1e6
+        compile_us = timeit.timeit(lambda: build().compile(dialect=dialect), number=iterations // 10) / (iterations // 10) * 1e6
+        print(f"{name:>9}: {before:7.2f} us built per call, {after:6.2f} us prebuilt ({before / after:5.1f}x), "
+              f"{compile_us:7.2f} us on a compiled-cache miss")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
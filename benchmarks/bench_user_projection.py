@@ -0,0 +1,66 @@
+"""
+Memory and CPU per page of users: full User entities versus rows of USER_RESPONSE_COLUMNS.
+
+Each page is loaded and turned into UserResponse objects, as the read endpoints do.
+Needs a Postgres database at DATABASE_URL with the schema migrated; the users table is
+seeded like in bench_list_totals. Run from the repository root:
+
+    python -m benchmarks.bench_user_projection [page_size] [iterations]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.user_model import User
+from app.schemas.user_schemas import UserResponse
+from app.services.user_service import USER_RESPONSE_COLUMNS
+from benchmarks.bench_list_totals import seed
+from settings.config import settings
+
+
+async def load_entities(session: AsyncSession, page_size: int):
+    result = await session.execute(select(User).order_by(User.created_at, User.id).limit(page_size))
+    return result.scalars().all()
+
+
+async def load_rows(session: AsyncSession, page_size: int):
+    result = await session.execute(select(*USER_RESPONSE_COLUMNS).order_by(User.created_at, User.id).limit(page_size))
+    return result.all()
+
+
+async def measure(session: AsyncSession, load, page_size: int, iterations: int):
+    cpu = 0.0
+    for _ in range(iterations):
+        session.expunge_all()
+        started = time.process_time()
+        users = await load(session, page_size)
+        [UserResponse.model_validate(user) for user in users]
+        cpu += time.process_time() - started
+    session.expunge_all()
+    tracemalloc.start()
+    users = await load(session, page_size)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu / iterations * 1e3, retained / 1024, peak / 1024
+
+
+async def main(page_size: int = 100, iterations: int = 200):
+    engine = create_async_engine(settings.database_url)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await seed(session, page_size)
+        results = {}
+        for name, load in (("entities", load_entities), ("rows", load_rows)):
+            results[name] = await measure(session, load, page_size, iterations)
+            cpu_ms, retained_kib, peak_kib = results[name]
+            print(f"{name:>8}: {cpu_ms:7.3f} ms CPU per page, {retained_kib:8.1f} KiB retained, {peak_kib:8.1f} KiB peak ({page_size} users)")
+        print(f"rows use {results['entities'][0] / results['rows'][0]:.1f}x less CPU "
+              f"and {results['entities'][1] / results['rows'][1]:.1f}x less retained memory")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
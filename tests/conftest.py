@@ -9,6 +9,8 @@ Fixtures:
 - `db_session`: Handles database transactions to ensure a clean database state for each test.
 - User fixtures (`user`, `locked_user`, `verified_user`, etc.): Set up various user states to test different behaviors under diverse conditions.
 - `token`: Generates an authentication token for testing secured endpoints.
+- `statement_counter`: Records every SQL statement sent to the test database, for round-trip assertions.
+- `round_trips`: Like `statement_counter`, plus BEGIN, COMMIT and ROLLBACK.
 - `initialize_database`: Prepares the database at the session start.
 - `setup_database`: Sets up and tears down the database before and after each test.
 """
@@ -23,18 +25,21 @@ from uuid import uuid4
 import pytest
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, scoped_session
 from faker import Faker
 
 # Application-specific imports
 from app.main import app
+from app.middleware.rate_limit import rate_limiter
 from app.database import Base, Database
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_read_db, get_settings
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
+from app.services.user_cache import user_cache
 from app.services.jwt_service import create_access_token
 
 fake = Faker()
@@ -43,6 +48,8 @@ settings = get_settings()
 TEST_DATABASE_URL = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
 engine = create_async_engine(TEST_DATABASE_URL, echo=settings.debug)
 AsyncTestingSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# What get_read_db hands out: its own session per request, in BEGIN READ ONLY transactions
+AsyncTestingReadOnlySessionLocal = sessionmaker(engine.execution_options(postgresql_readonly=True), class_=AsyncSession, expire_on_commit=False)
 AsyncSessionScoped = scoped_session(AsyncTestingSessionLocal)
 
 
@@ -54,11 +61,18 @@ def email_service():
     return email_service
 
 
+async def read_only_session():
+    async with AsyncTestingReadOnlySessionLocal() as session:
+        yield session
+
+
 # this is what creates the http client for your api tests
 @pytest.fixture(scope="function")
 async def async_client(db_session):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_read_db] = read_only_session
+        rate_limiter.reset()
         try:
             yield client
         finally:
@@ -76,6 +90,8 @@ def initialize_database():
 async def setup_database():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # cached users would outlive the tables they were read from
+    user_cache.clear()
     yield
     async with engine.begin() as conn:
         # you can comment out this line during development if you are debugging a single test
@@ -90,6 +106,30 @@ async def db_session(setup_database):
         finally:
             await session.close()
 
+# records the SQL of every statement executed on the test engine; call .clear() before the code under test
+@pytest.fixture(scope="function")
+def statement_counter():
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+# like statement_counter, but also records BEGIN, COMMIT and ROLLBACK so every round trip is visible
+@pytest.fixture(scope="function")
+def round_trips(statement_counter):
+    listeners = [(name, lambda conn, *args, name=name: statement_counter.append(name.upper())) for name in ("begin", "commit", "rollback")]
+    for name, listener in listeners:
+        event.listen(engine.sync_engine, name, listener)
+    try:
+        yield statement_counter
+    finally:
+        for name, listener in listeners:
+            event.remove(engine.sync_engine, name, listener)
+
 @pytest.fixture(scope="function")
 async def locked_user(db_session):
     unique_email = fake.email()
@@ -0,0 +1,34 @@
+import pytest
+from urllib.parse import urlencode
+from app.services.jwt_service import decode_token
+
+async def login(async_client, user):
+    form_data = {"username": user.email, "password": "MySuperPassword$1234"}
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 200
+    return response.json()
+
+@pytest.mark.asyncio
+async def test_login_issues_refresh_token(async_client, verified_user):
+    data = await login(async_client, verified_user)
+    assert data["refresh_token"]
+
+@pytest.mark.asyncio
+async def test_refresh_issues_new_tokens(async_client, verified_user):
+    data = await login(async_client, verified_user)
+    response = await async_client.post("/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != data["refresh_token"]
+    assert decode_token(refreshed["access_token"])["sub"] == verified_user.email
+
+@pytest.mark.asyncio
+async def test_refresh_token_cannot_be_reused(async_client, verified_user):
+    data = await login(async_client, verified_user)
+    first = await async_client.post("/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert first.status_code == 200
+    replay = await async_client.post("/token/refresh", json={"refresh_token": data["refresh_token"]})
+    assert replay.status_code == 401
+    # The replay revoked the token handed out by the first refresh as well
+    second = await async_client.post("/token/refresh", json={"refresh_token": first.json()["refresh_token"]})
+    assert second.status_code == 401
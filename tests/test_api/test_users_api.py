@@ -1,4 +1,5 @@
 from builtins import str
+import json
 import pytest
 from httpx import AsyncClient
 from app.main import app
@@ -55,6 +56,13 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
     assert response.status_code == 200
     assert response.json()["email"] == updated_data["email"]
 
+@pytest.mark.asyncio
+async def test_update_user_email_taken(async_client, admin_user, verified_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.put(f"/users/{admin_user.id}", json={"email": verified_user.email}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already exists"
+
 
 @pytest.mark.asyncio
 async def test_delete_user(async_client, admin_user, admin_token):
@@ -109,6 +117,42 @@ async def test_login_success(async_client, verified_user):
     assert decoded_token is not None, "Failed to decode token"
     assert decoded_token["role"] == "AUTHENTICATED", "The user role should be AUTHENTICATED"
 
+@pytest.mark.asyncio
+async def test_login_statement_count(async_client, verified_user, statement_counter):
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    statement_counter.clear()
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 200
+    # a SELECT of the user, a SELECT checking it was not locked meanwhile and an INSERT of the
+    # refresh token; last_login_at is written behind
+    assert [sql.split()[0] for sql in statement_counter] == ["SELECT", "SELECT", "INSERT"]
+
+    form_data["password"] = "IncorrectPassword123!"
+    statement_counter.clear()
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 401
+    assert [sql.split()[0] for sql in statement_counter] == ["SELECT", "UPDATE"]
+
+@pytest.mark.asyncio
+async def test_read_endpoints_never_commit(async_client, admin_user, admin_token, round_trips):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    # every read route gets its own READ ONLY session, which is closed (rolled back), never committed
+    round_trips.clear()
+    response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    assert response.status_code == 200
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "SELECT", "ROLLBACK"]
+
+    round_trips.clear()
+    response = await async_client.get("/users/?total=exact", headers=headers)
+    assert response.status_code == 200
+    # page and count share one transaction
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "SELECT", "SELECT", "ROLLBACK"]
+
+    round_trips.clear()
+    response = await async_client.get(f"/users/search?q={admin_user.nickname}", headers=headers)
+    assert response.status_code == 200
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "SELECT", "ROLLBACK"]
+
 @pytest.mark.asyncio
 async def test_login_user_not_found(async_client):
     form_data = {
@@ -179,6 +223,127 @@ async def test_list_users_as_admin(async_client, admin_token):
     assert response.status_code == 200
     assert 'items' in response.json()
 
+@pytest.mark.asyncio
+async def test_list_users_follows_next_cursor(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?limit=30", headers=headers)
+    assert response.status_code == 200
+    links = {link["rel"]: link["href"] for link in response.json()["links"]}
+    assert "prev" not in links
+    next_page = await async_client.get(links["next"], headers=headers)
+    assert next_page.status_code == 200
+    seen = {item["id"] for item in response.json()["items"]}
+    assert not seen & {item["id"] for item in next_page.json()["items"]}
+    assert "prev" in {link["rel"] for link in next_page.json()["links"]}
+
+@pytest.mark.asyncio
+async def test_list_users_invalid_cursor(async_client, admin_token):
+    response = await async_client.get("/users/?cursor=garbage", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_list_users_total_mode(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?total=estimated", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["total_mode"] == "estimated"
+    assert response.json()["total"] >= 1
+    response = await async_client.get("/users/?total=bogus", headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_import_users_streams_results(async_client, admin_token):
+    body = "email,password\nimported@example.com,Secure*1234\nbad-email,Secure*1234\n"
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"}
+    response = await async_client.post("/users/import", content=body, headers=headers)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("status") for line in lines[:-1]] == ["created", "invalid"]
+    assert lines[-1] == {"summary": {"created": 1, "invalid": 1}}
+
+@pytest.mark.asyncio
+async def test_import_users_reads_a_body_sent_in_many_chunks(async_client, admin_token):
+    body = "email,password\n" + "".join(f"chunked{i}@example.com,Secure*1234\n" for i in range(8))
+
+    async def chunks():
+        # Several more_body=True messages, split mid-line, like a real upload
+        for start in range(0, len(body), 40):
+            yield body[start:start + 40].encode()
+
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"}
+    response = await async_client.post("/users/import", content=chunks(), headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[-1]) == {"summary": {"created": 8}}
+
+@pytest.mark.asyncio
+async def test_import_users_requires_admin_and_known_format(async_client, admin_token, manager_token):
+    response = await async_client.post("/users/import", content="{}", headers={"Authorization": f"Bearer {admin_token}", "Content-Type": "application/json"})
+    assert response.status_code == 415
+    response = await async_client.post("/users/import", content="{}", headers={"Authorization": f"Bearer {manager_token}", "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_export_users_csv_with_selected_columns(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/export?format=csv&columns=email,role&role=AUTHENTICATED", headers=headers)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "email,role"
+    assert len(lines) == 51
+    assert all(line.endswith(",AUTHENTICATED") for line in lines[1:])
+
+@pytest.mark.asyncio
+async def test_export_users_rejects_secret_columns(async_client, admin_token):
+    response = await async_client.get("/users/export?columns=email,hashed_password", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_batch_lookup_users(async_client, manager_token, verified_user):
+    headers = {"Authorization": f"Bearer {manager_token}"}
+    body = {"ids": [str(verified_user.id)], "emails": ["missing@example.com"]}
+    response = await async_client.post("/users/lookup", json=body, headers=headers)
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [str(verified_user.id)]
+    assert response.json()["not_found"] == ["missing@example.com"]
+
+@pytest.mark.asyncio
+async def test_bulk_lock_users_reports_each_id(async_client, admin_token, verified_user, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    missing_id = "00000000-0000-0000-0000-000000000000"
+    body = {"action": "lock", "ids": [str(verified_user.id), missing_id, str(user.id)]}
+    response = await async_client.post("/users/bulk", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["matched"] == 2
+    assert [(result["id"], result["status"]) for result in response.json()["results"]] == [
+        (str(verified_user.id), "updated"), (missing_id, "not_found"), (str(user.id), "updated")
+    ]
+
+@pytest.mark.asyncio
+async def test_bulk_request_needs_exactly_one_target(async_client, admin_token, verified_user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    body = {"action": "delete", "ids": [str(verified_user.id)], "filter": {"is_locked": True}}
+    assert (await async_client.post("/users/bulk", json=body, headers=headers)).status_code == 422
+    body = {"action": "delete", "filter": {}}
+    assert (await async_client.post("/users/bulk", json=body, headers=headers)).status_code == 422
+
+@pytest.mark.asyncio
+async def test_bulk_users_requires_admin(async_client, manager_token, verified_user):
+    headers = {"Authorization": f"Bearer {manager_token}"}
+    body = {"action": "unlock", "ids": [str(verified_user.id)]}
+    assert (await async_client.post("/users/bulk", json=body, headers=headers)).status_code == 403
+
+@pytest.mark.asyncio
+async def test_search_users_pages_with_filters(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/search?role=AUTHENTICATED&limit=40", headers=headers)
+    assert response.status_code == 200
+    links = {link["rel"]: link["href"] for link in response.json()["links"]}
+    assert "role=AUTHENTICATED" in links["next"]
+    next_page = await async_client.get(links["next"], headers=headers)
+    assert next_page.json()["size"] == 10
+    response = await async_client.get("/users/search?q=ab", headers=headers)
+    assert response.status_code == 422
+
 @pytest.mark.asyncio
 async def test_list_users_as_manager(async_client, manager_token):
     response = await async_client.get(
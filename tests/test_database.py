@@ -0,0 +1,124 @@
+# test_database.py
+import asyncio
+import pytest
+from sqlalchemy import exc, select, text, update
+from app.database import Database, ReplicaSet, RoutingSession, create_engine
+from app.models.user_model import User
+from app.dependencies import get_settings
+
+pytestmark = pytest.mark.asyncio
+
+settings = get_settings()
+
+
+async def test_pool_metrics_track_checkouts_and_overflow():
+    engine = create_engine(settings.database_url, pool_size=1, max_overflow=1)
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            metrics = engine.pool.metrics()
+            assert metrics["checked_out"] == 2
+            assert metrics["overflow"] == 1
+        metrics = engine.pool.metrics()
+        assert metrics["checked_out"] == 0
+        assert metrics["checkouts"] == 2
+    finally:
+        await engine.dispose()
+
+
+async def test_pool_metrics_count_checkout_timeouts():
+    engine = create_engine(settings.database_url, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    try:
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                await engine.connect().start()
+        metrics = engine.pool.metrics()
+        assert metrics["checkout_timeouts"] == 1
+        assert metrics["wait_ms_max"] >= 100
+    finally:
+        await engine.dispose()
+
+
+async def test_only_read_only_sessions_use_replicas(monkeypatch):
+    replica = create_engine(settings.database_url)
+    monkeypatch.setattr(Database, "_replicas", ReplicaSet([replica]))
+    primary = Database._engine.sync_engine
+    # sessions that may write read from the primary, so they never act on a lagging replica
+    session = RoutingSession()
+    assert session.get_bind(clause=select(User)) is primary
+    assert session.get_bind(clause=update(User)) is primary
+    assert RoutingSession(info={"read_only": True}).get_bind(clause=select(User)) is replica.sync_engine
+    await replica.dispose()
+
+
+async def test_replica_set_skips_unhealthy_replicas(monkeypatch):
+    first, second = create_engine(settings.database_url), create_engine(settings.database_url)
+    replicas = ReplicaSet([first, second])
+    assert [replicas.next_engine() for _ in range(4)] == [first, second, first, second]
+    replicas.mark(0, False)
+    assert [replicas.next_engine() for _ in range(3)] == [second, second, second]
+    replicas.mark(1, False)
+    assert replicas.next_engine() is None
+
+    monkeypatch.setattr(Database, "_replicas", replicas)
+    assert RoutingSession(info={"read_only": True}).get_bind(clause=select(User)) is Database._read_only_engine.sync_engine
+    await replicas.dispose()
+
+
+async def test_pinned_read_only_sessions_use_the_primary(monkeypatch):
+    replica = create_engine(settings.database_url)
+    monkeypatch.setattr(Database, "_replicas", ReplicaSet([replica]))
+    session = RoutingSession(info={"read_only": True, "primary": True})
+    assert session.get_bind(clause=select(User)) is Database._read_only_engine.sync_engine
+    await replica.dispose()
+
+
+async def test_hung_replica_health_check_times_out(monkeypatch):
+    healthy, hung = create_engine(settings.database_url), create_engine(settings.database_url)
+    replicas = ReplicaSet([hung, healthy], health_timeout=0.1)
+
+    async def ping(engine):
+        if engine is hung:
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr(ReplicaSet, "_ping", staticmethod(ping))
+    await asyncio.wait_for(replicas.check_health(), 1)
+    assert replicas.healthy == [False, True]
+    await replicas.dispose()
+
+
+async def test_replica_health_check_marks_unreachable_replicas():
+    unreachable = settings.database_url.rsplit("@", 1)[0] + "@localhost:1/none"
+    replicas = ReplicaSet([create_engine(settings.database_url), create_engine(unreachable)])
+    await replicas.check_health()
+    assert replicas.healthy == [True, False]
+    assert [entry["healthy"] for entry in replicas.metrics()] == [True, False]
+    await replicas.dispose()
+
+
+async def test_read_only_sessions_stay_off_the_primary_write_path(monkeypatch):
+    session = RoutingSession(info={"read_only": True})
+    assert session.get_bind(clause=update(User)) is Database._read_only_engine.sync_engine
+    replica = create_engine(settings.database_url)
+    monkeypatch.setattr(Database, "_replicas", ReplicaSet([replica]))
+    session = RoutingSession(info={"read_only": True})
+    assert session.get_bind(clause=update(User)) is replica.sync_engine
+    await replica.dispose()
+
+
+async def test_read_only_session_rejects_writes():
+    async with Database.get_read_only_session_factory()() as session:
+        with pytest.raises(exc.DBAPIError, match="read-only transaction"):
+            await session.execute(update(User).values(bio="x"))
+
+
+async def test_transaction_pooler_mode_does_not_cache_prepared_statements():
+    engine = create_engine(settings.database_url, transaction_pooler=True)
+    try:
+        async with engine.connect() as connection:
+            for _ in range(2):
+                assert (await connection.execute(text("SELECT 1"))).scalar() == 1
+            raw = await connection.get_raw_connection()
+            assert raw.dbapi_connection._prepared_statement_cache is None
+    finally:
+        await engine.dispose()
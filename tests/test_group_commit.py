@@ -0,0 +1,39 @@
+# test_group_commit.py
+import asyncio
+import pytest
+from app.utils.group_commit import GroupCommit
+
+pytestmark = pytest.mark.asyncio
+
+async def test_concurrent_submits_share_one_write():
+    batches = []
+
+    async def write_batch(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    group = GroupCommit(write_batch, window=0.01, max_batch=100)
+    results = await asyncio.gather(*(group.submit(i) for i in range(5)))
+    assert results == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert group.metrics()["batches"] == 1
+
+async def test_full_batch_is_written_before_the_window_closes():
+    batches = []
+
+    async def write_batch(items):
+        batches.append(items)
+        return items
+
+    group = GroupCommit(write_batch, window=60, max_batch=3)
+    assert await asyncio.wait_for(asyncio.gather(*(group.submit(i) for i in range(3))), timeout=1) == [0, 1, 2]
+    assert batches == [[0, 1, 2]]
+
+async def test_failed_write_reaches_every_submitter():
+    async def write_batch(items):
+        raise RuntimeError("database down")
+
+    group = GroupCommit(write_batch, window=0.01, max_batch=100)
+    results = await asyncio.gather(group.submit(1), group.submit(2), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert group.metrics()["errors"] == 1
@@ -0,0 +1,80 @@
+# test_jwt_keys.py
+from datetime import timedelta
+
+import jwt
+import pytest
+from app.services import jwt_keys
+from app.services.jwt_keys import KeyRing, generate_private_key_pem
+from app.services.jwt_service import create_access_token, decode_token, verified_token_cache
+
+
+@pytest.fixture
+def key_files(tmp_path):
+    rsa_path = tmp_path / "old.pem"
+    rsa_path.write_bytes(generate_private_key_pem("RS256"))
+    ed_path = tmp_path / "new.pem"
+    ed_path.write_bytes(generate_private_key_pem("EdDSA"))
+    return rsa_path, ed_path
+
+
+@pytest.fixture
+def use_key_ring(monkeypatch):
+    def install(key_ring):
+        monkeypatch.setattr(jwt_keys, "_key_ring", key_ring)
+        verified_token_cache.clear()
+    yield install
+    verified_token_cache.clear()
+
+
+def make_token():
+    return create_access_token(data={"sub": "keys@example.com", "role": "admin"}, expires_delta=timedelta(minutes=5))
+
+
+def test_tokens_are_signed_with_the_active_key(key_files, use_key_ring):
+    rsa_path, ed_path = key_files
+    use_key_ring(KeyRing.from_setting(f"old={rsa_path},new={ed_path}", active_kid="new"))
+    token = make_token()
+    assert jwt.get_unverified_header(token) == {"alg": "EdDSA", "kid": "new", "typ": "JWT"}
+    assert decode_token(token)["sub"] == "keys@example.com"
+
+
+def test_tokens_signed_with_a_rotated_key_still_verify(key_files, use_key_ring):
+    rsa_path, ed_path = key_files
+    use_key_ring(KeyRing.from_setting(f"old={rsa_path}"))
+    old_token = make_token()
+    use_key_ring(KeyRing.from_setting(f"new={ed_path},old={rsa_path}"))
+    assert decode_token(old_token)["sub"] == "keys@example.com"
+    use_key_ring(KeyRing.from_setting(f"new={ed_path}"))
+    assert decode_token(old_token) is None
+
+
+def test_hs256_tokens_are_rejected_by_the_key_ring(key_files, use_key_ring):
+    hs_token = make_token()
+    use_key_ring(KeyRing.from_setting(str(key_files[0])))
+    assert decode_token(hs_token) is None
+
+
+def test_active_kid_must_be_a_private_key(key_files):
+    with pytest.raises(ValueError):
+        KeyRing.from_setting(f"old={key_files[0]}", active_kid="missing")
+
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_publishes_public_keys(async_client, key_files, use_key_ring):
+    rsa_path, ed_path = key_files
+    use_key_ring(KeyRing.from_setting(f"old={rsa_path},new={ed_path}"))
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    keys = {key["kid"]: key for key in response.json()["keys"]}
+    assert keys["old"]["kty"] == "RSA" and keys["old"]["alg"] == "RS256"
+    assert keys["new"]["kty"] == "OKP" and keys["new"]["crv"] == "Ed25519"
+    assert all("d" not in key for key in keys.values())
+
+    public_key = jwt.PyJWK(keys["old"]).key
+    assert jwt.decode(make_token(), public_key, algorithms=["RS256"])["sub"] == "keys@example.com"
+
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_is_empty_without_asymmetric_keys(async_client):
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.json() == {"keys": []}
@@ -0,0 +1,67 @@
+# test_jwt_service.py
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from app.services import jwt_service
+from app.services.jwt_service import create_access_token, decode_token_cached, verified_token_cache
+from app.utils.lru_cache import LRUCache
+from settings.config import settings
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    verified_token_cache.clear()
+    yield
+    verified_token_cache.clear()
+
+
+def make_token(minutes=30):
+    return create_access_token(data={"sub": "cache@example.com", "role": "admin"}, expires_delta=timedelta(minutes=minutes))
+
+
+def test_decode_token_cached_reuses_verified_claims():
+    token = make_token()
+    hits = verified_token_cache.hits
+    with patch.object(jwt_service, "decode_token", wraps=jwt_service.decode_token) as decode:
+        first = decode_token_cached(token)
+        second = decode_token_cached(token)
+    assert first == second and first["role"] == "ADMIN"
+    assert decode.call_count == 1
+    assert verified_token_cache.hits == hits + 1
+
+
+def test_decode_token_cached_rejects_invalid_tokens():
+    assert decode_token_cached("not-a-token") is None
+    assert len(verified_token_cache) == 0
+
+
+def test_decode_token_cached_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "jwt_cache_enabled", False)
+    token = make_token()
+    with patch.object(jwt_service, "decode_token", wraps=jwt_service.decode_token) as decode:
+        decode_token_cached(token)
+        decode_token_cached(token)
+    assert decode.call_count == 2
+    assert len(verified_token_cache) == 0
+
+
+def test_cached_claims_expire_with_the_token():
+    token = make_token()
+    payload = decode_token_cached(token)
+    with patch("app.utils.lru_cache.time.time", return_value=payload["exp"] + 1), \
+            patch.object(jwt_service, "decode_token", return_value=None) as decode:
+        assert decode_token_cached(token) is None
+    decode.assert_called_once_with(token)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.metrics()["evictions"] == 1
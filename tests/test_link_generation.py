@@ -1,11 +1,15 @@
-from builtins import len, max, sorted, str
+from builtins import len, max, range, sorted, str
+from datetime import datetime, timezone
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 from urllib.parse import parse_qs, urlparse, parse_qsl, urlunparse, urlencode
 from uuid import uuid4
 
 import pytest
 from fastapi import Request
+from starlette.datastructures import URL
 
+from app.utils.cursor import NEXT, PREV, decode_cursor
 from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links
 
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
@@ -26,7 +30,7 @@ def normalize_url(url):
 def mock_request():
     request = MagicMock(spec=Request)
     request.url_for = MagicMock(side_effect=lambda action, user_id: f"http://testserver/{action}/{user_id}")
-    request.url = "http://testserver/users"
+    request.url = URL("http://testserver/users")
     return request
 
 def test_create_link():
@@ -42,10 +46,17 @@ def test_create_user_links(mock_request):
     assert normalize_url(str(links[2].href)) == f"http://testserver/delete_user/{user_id}"
 
 def test_generate_pagination_links(mock_request):
-    skip = 10
-    limit = 5
-    total_items = 50
-    links = generate_pagination_links(mock_request, skip, limit, total_items)
-    assert len(links) >= 4
-    expected_self_url = "http://testserver/users?limit=5&skip=10"
+    items = [SimpleNamespace(created_at=datetime(2024, 1, 1, tzinfo=timezone.utc), id=uuid4()) for _ in range(5)]
+    links = generate_pagination_links(mock_request, items, 5, has_next=True, has_prev=True)
+    assert [link.rel for link in links] == ["self", "first", "next", "prev"]
+    expected_self_url = "http://testserver/users?limit=5"
     assert normalize_url(str(links[0].href)) == normalize_url(expected_self_url), "Self link should match expected URL"
+    next_query = parse_qs(urlparse(str(links[2].href)).query)
+    assert decode_cursor(next_query["cursor"][0]) == (items[-1].created_at, items[-1].id, NEXT)
+    prev_query = parse_qs(urlparse(str(links[3].href)).query)
+    assert decode_cursor(prev_query["cursor"][0]) == (items[0].created_at, items[0].id, PREV)
+
+def test_generate_pagination_links_first_page(mock_request):
+    items = [SimpleNamespace(created_at=datetime(2024, 1, 1, tzinfo=timezone.utc), id=uuid4())]
+    links = generate_pagination_links(mock_request, items, 5, has_next=False, has_prev=False)
+    assert [link.rel for link in links] == ["self", "first"]
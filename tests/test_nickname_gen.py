@@ -0,0 +1,12 @@
+# test_nickname_gen.py
+import re
+from app.utils.nickname_gen import NAMESPACE_SIZE, generate_nickname
+
+def test_nicknames_are_url_safe_and_fit_the_column():
+    for _ in range(1000):
+        nickname = generate_nickname()
+        assert re.match(r'^[\w-]+$', nickname) and 3 <= len(nickname) <= 50
+
+def test_namespace_is_large_enough_to_avoid_collisions():
+    assert NAMESPACE_SIZE > 1_000_000_000
+    assert len({generate_nickname() for _ in range(10000)}) > 9990
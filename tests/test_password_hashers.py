@@ -0,0 +1,73 @@
+# test_password_hashers.py
+import pytest
+from app.utils import password_hashers
+from app.utils.password_hashers import (
+    Argon2idHasher, BcryptHasher, PasswordHasher, calibrate, check_password, get_hasher, identify_hasher,
+    make_password, password_needs_rehash, register_hasher
+)
+from app.utils.security import hash_password
+
+
+@pytest.fixture
+def fast_argon2():
+    return Argon2idHasher(time_cost=1, memory_cost=1024, parallelism=1)
+
+
+def test_default_hasher_is_bcrypt():
+    hashed = make_password("secure_password")
+    assert hashed.startswith("$2b$")
+    assert isinstance(identify_hasher(hashed), BcryptHasher)
+
+
+def test_check_password_accepts_every_registered_algorithm(fast_argon2):
+    bcrypt_hash = BcryptHasher(rounds=4).hash("secure_password")
+    argon2_hash = fast_argon2.hash("secure_password")
+    assert argon2_hash.startswith("$argon2id$")
+    assert check_password("secure_password", bcrypt_hash) is True
+    assert check_password("secure_password", argon2_hash) is True
+    assert check_password("wrong_password", argon2_hash) is False
+
+
+def test_incomplete_hasher_cannot_be_instantiated():
+    class HashOnly(PasswordHasher):
+        algorithm = "hash-only"
+
+        def hash(self, password):
+            return password
+
+    with pytest.raises(TypeError):
+        HashOnly()
+
+
+def test_check_password_unknown_format():
+    with pytest.raises(ValueError):
+        check_password("secure_password", "invalid_hash_format")
+
+
+def test_bcrypt_needs_rehash_on_cost_change():
+    hasher = BcryptHasher(rounds=5)
+    assert hasher.needs_rehash(hash_password("secure_password", rounds=4)) is True
+    assert hasher.needs_rehash(hash_password("secure_password", rounds=5)) is False
+
+
+def test_password_needs_rehash_on_algorithm_change(fast_argon2):
+    argon2_hash = fast_argon2.hash("secure_password")
+    assert password_needs_rehash(argon2_hash) is True
+    assert password_needs_rehash(hash_password("secure_password", rounds=get_hasher().rounds)) is False
+
+
+def test_register_hasher_replaces_factory():
+    original = password_hashers._HASHER_FACTORIES["bcrypt"]
+    register_hasher("bcrypt", lambda: BcryptHasher(rounds=4))
+    try:
+        assert get_hasher("bcrypt").rounds == 4
+    finally:
+        # later tests must get the configured hasher back
+        register_hasher("bcrypt", original)
+    assert get_hasher("bcrypt").rounds == password_hashers.settings.bcrypt_rounds
+
+
+def test_calibrate_respects_target():
+    result = calibrate("bcrypt", target_ms=50)
+    assert 4 <= result["bcrypt_rounds"] < 31
+    assert result["ms"] <= 50 or result["bcrypt_rounds"] == 4
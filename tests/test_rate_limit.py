@@ -0,0 +1,96 @@
+# test_rate_limit.py
+from urllib.parse import urlencode
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.middleware.rate_limit import MemoryBackend, RateLimitMiddleware, RateLimiter, RateLimitRule
+
+pytestmark = pytest.mark.asyncio
+
+
+async def echo_login(request: Request):
+    form = await request.form()
+    return JSONResponse({"username": form["username"]})
+
+
+async def ok(request: Request):
+    return JSONResponse({"ok": True})
+
+
+def make_client(*rules, max_login_body=65536):
+    limiter = RateLimiter(list(rules), MemoryBackend())
+    inner = Starlette(routes=[Route("/login/", echo_login, methods=["POST"]), Route("/open", ok)])
+    return AsyncClient(app=RateLimitMiddleware(inner, limiter, max_login_body), base_url="http://testserver"), limiter
+
+
+def login_form(username):
+    return {"data": urlencode({"username": username, "password": "x"}), "headers": {"Content-Type": "application/x-www-form-urlencoded"}}
+
+
+async def test_memory_backend_refills_over_time(monkeypatch):
+    backend = MemoryBackend()
+    clock = [100.0]
+    monkeypatch.setattr("app.middleware.rate_limit.time.monotonic", lambda: clock[0])
+    assert await backend.consume("k", capacity=2, refill_rate=1.0) == 0
+    assert await backend.consume("k", capacity=2, refill_rate=1.0) == 0
+    assert await backend.consume("k", capacity=2, refill_rate=1.0) == pytest.approx(1.0)
+    clock[0] += 1.5
+    assert await backend.consume("k", capacity=2, refill_rate=1.0) == 0
+
+
+async def test_ip_limit_returns_429_with_retry_after():
+    client, limiter = make_client(RateLimitRule("POST", "/login/", "ip", capacity=2, per_seconds=60))
+    async with client:
+        assert (await client.post("/login/", **login_form("a@example.com"))).status_code == 200
+        assert (await client.post("/login/", **login_form("b@example.com"))).status_code == 200
+        response = await client.post("/login/", **login_form("c@example.com"))
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert limiter.metrics()["rules"]["POST /login/ ip"] == {"allowed": 2, "limited": 1}
+
+
+async def test_account_limit_is_per_username_and_body_is_preserved():
+    client, _ = make_client(RateLimitRule("POST", "/login/", "account", capacity=1, per_seconds=60))
+    async with client:
+        response = await client.post("/login/", **login_form("a@example.com"))
+        assert response.json() == {"username": "a@example.com"}
+        assert (await client.post("/login/", **login_form("A@example.com"))).status_code == 429
+        assert (await client.post("/login/", **login_form("b@example.com"))).status_code == 200
+
+
+async def test_oversized_login_body_is_rejected():
+    client, _ = make_client(RateLimitRule("POST", "/login/", "account", capacity=1, per_seconds=60), max_login_body=1024)
+    async with client:
+        response = await client.post("/login/", content=b"username=" + b"a" * 2048, headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 413
+
+
+async def test_excluded_paths_are_not_limited():
+    client, limiter = make_client(RateLimitRule("POST", "/login*", "ip", capacity=1, per_seconds=60, exclude=["/login/"]))
+    async with client:
+        for _ in range(3):
+            assert (await client.post("/login/", **login_form("a@example.com"))).status_code == 200
+    assert limiter.metrics()["rules"]["POST /login* ip"] == {"allowed": 0, "limited": 0}
+
+
+async def test_unmatched_routes_are_not_limited():
+    client, limiter = make_client(RateLimitRule("POST", "/login/", "ip", capacity=1, per_seconds=60))
+    async with client:
+        for _ in range(3):
+            assert (await client.get("/open")).status_code == 200
+    assert limiter.metrics()["rules"]["POST /login/ ip"] == {"allowed": 0, "limited": 0}
+
+
+async def test_login_endpoint_is_rate_limited_per_account(async_client, verified_user):
+    form = {"username": verified_user.email, "password": "IncorrectPassword123!"}
+    statuses = []
+    for _ in range(11):
+        response = await async_client.post("/login/", data=urlencode(form), headers={"Content-Type": "application/x-www-form-urlencoded"})
+        statuses.append(response.status_code)
+    assert 429 not in statuses[:10]
+    assert statuses[10] == 429
@@ -0,0 +1,58 @@
+# test_read_your_writes.py
+from uuid import uuid4
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_db, get_read_db
+from app.middleware.read_your_writes import READ_PRIMARY_COOKIE, ReadYourWritesMiddleware
+from app.models.user_model import User
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_client(window=5.0):
+    app = FastAPI()
+
+    @app.post("/write")
+    async def write(db: AsyncSession = Depends(get_db)):
+        await db.execute(update(User).where(User.id == uuid4()).values(bio="x"))
+        await db.commit()
+        return {}
+
+    @app.post("/read-and-commit")
+    async def read_and_commit(db: AsyncSession = Depends(get_db)):
+        await db.execute(select(User.id).limit(1))
+        await db.commit()
+        return {}
+
+    @app.get("/read")
+    async def read(db: AsyncSession = Depends(get_read_db)):
+        return {"primary": bool(db.info.get("primary"))}
+
+    return AsyncClient(app=ReadYourWritesMiddleware(app, window=window), base_url="http://testserver")
+
+
+# Test a committed write pins the client's following reads to the primary
+async def test_reads_after_a_write_use_the_primary():
+    async with make_client() as client:
+        assert (await client.get("/read")).json() == {"primary": False}
+        response = await client.post("/write")
+        assert READ_PRIMARY_COOKIE in response.cookies
+        assert (await client.get("/read")).json() == {"primary": True}
+
+# Test a request that only read sets no cookie, even if it commits
+async def test_commit_without_write_does_not_pin():
+    async with make_client() as client:
+        response = await client.post("/read-and-commit")
+        assert READ_PRIMARY_COOKIE not in response.cookies
+        assert (await client.get("/read")).json() == {"primary": False}
+
+# Test a cookie whose window has passed no longer pins reads
+async def test_expired_window_reads_from_replicas():
+    async with make_client() as client:
+        client.cookies.set(READ_PRIMARY_COOKIE, "1.0")
+        assert (await client.get("/read")).json() == {"primary": False}
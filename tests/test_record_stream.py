@@ -0,0 +1,39 @@
+# test_record_stream.py
+from datetime import datetime, timezone
+from uuid import uuid4
+import json
+import pytest
+from app.models.user_model import UserRole
+from app.utils.record_stream import iter_csv_lines, iter_file_chunks, iter_ndjson_lines, iter_ndjson_records, spool
+
+pytestmark = pytest.mark.asyncio
+
+async def rows(*values):
+    for value in values:
+        yield value
+
+async def test_ndjson_lines_serialize_enums_dates_and_uuids():
+    user_id = uuid4()
+    created_at = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    output = "".join([chunk async for chunk in iter_ndjson_lines(rows((user_id, UserRole.ADMIN, created_at, None)), ["id", "role", "created_at", "bio"])])
+    assert json.loads(output) == {"id": str(user_id), "role": "ADMIN", "created_at": created_at.isoformat(), "bio": None}
+
+async def test_csv_lines_flush_in_pieces():
+    chunks = [chunk async for chunk in iter_csv_lines(rows(*((f"user{i}@example.com", "a,b") for i in range(100))), ["email", "bio"], flush_bytes=256)]
+    assert len(chunks) > 1
+    lines = "".join(chunks).splitlines()
+    assert lines[0] == "email,bio"
+    assert lines[1] == 'user0@example.com,"a,b"'
+    assert len(lines) == 101
+
+async def test_spool_rolls_over_to_disk_and_replays_every_byte():
+    body = spool(rows(*(bytes([i]) * 100 for i in range(4))), max_memory=150)
+    spooled = await body
+    assert spooled._rolled
+    assert b"".join([chunk async for chunk in iter_file_chunks(spooled, chunk_size=64)]) == b"".join(bytes([i]) * 100 for i in range(4))
+    spooled.close()
+
+async def test_overlong_line_is_reported_without_being_buffered():
+    chunks = rows(b'{"a": 1}\n{"b": "', *(b"x" * 10 for _ in range(10)), b'"}\n{"c": 3}\n')
+    records = [record async for record in iter_ndjson_records(chunks, max_line_length=32)]
+    assert records == [(1, {"a": 1}, None), (2, None, "Line longer than 32 bytes"), (3, {"c": 3}, None)]
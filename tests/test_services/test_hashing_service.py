@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import pytest
+from app.services.hashing_service import HashingService, HashPriority, HashingQueueFullError
+from app.utils.password_hashers import BcryptHasher
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_hash_and_verify_round_trip():
+    service = HashingService(max_workers=2, max_queue_size=10)
+    hashed = await service.hash("MySuperPassword$1234", hasher=BcryptHasher(rounds=4))
+    assert await service.verify("MySuperPassword$1234", hashed) is True
+    assert await service.verify("WrongPassword", hashed) is False
+    assert service.metrics()["completed"] == 3
+    service.shutdown()
+
+
+async def test_login_lane_runs_before_registration_lane():
+    service = HashingService(max_workers=1, max_queue_size=10)
+    gate = threading.Event()
+    order = []
+
+    blocker = asyncio.ensure_future(service.submit(HashPriority.REGISTRATION, gate.wait))
+    await asyncio.sleep(0)
+    registration = asyncio.ensure_future(service.submit(HashPriority.REGISTRATION, order.append, "registration"))
+    login = asyncio.ensure_future(service.submit(HashPriority.LOGIN, order.append, "login"))
+    await asyncio.sleep(0)
+    assert service.metrics()["queue_depth_by_lane"] == {"login": 1, "registration": 1, "bulk": 0}
+
+    gate.set()
+    await asyncio.gather(blocker, registration, login)
+    assert order == ["login", "registration"]
+    service.shutdown()
+
+
+async def test_saturated_queue_rejects_jobs():
+    service = HashingService(max_workers=1, max_queue_size=1)
+    gate = threading.Event()
+    blocker = asyncio.ensure_future(service.submit(HashPriority.LOGIN, gate.wait))
+    queued = asyncio.ensure_future(service.submit(HashPriority.LOGIN, gate.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HashingQueueFullError):
+        await service.submit(HashPriority.LOGIN, gate.wait)
+    assert service.metrics()["rejected"] == 1
+
+    gate.set()
+    await asyncio.gather(blocker, queued)
+    service.shutdown()
+
+
+async def test_worker_errors_propagate_to_caller():
+    service = HashingService(max_workers=1, max_queue_size=1)
+    with pytest.raises(ValueError):
+        await service.verify("secure_password", "invalid_hash_format")
+    assert service.metrics()["failed"] == 1
+    service.shutdown()
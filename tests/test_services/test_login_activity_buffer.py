@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from app.models.user_model import User
+from app.services.login_activity_buffer import LoginActivityBuffer, login_activity_buffer
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+# Test that buffered timestamps are merged per user and written in one batch
+async def test_flush_writes_latest_timestamp_per_user(db_session, verified_user, user):
+    buffer = LoginActivityBuffer(interval=60, max_pending=100)
+    earlier = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    later = earlier + timedelta(minutes=5)
+    buffer.record(verified_user.id, later)
+    buffer.record(verified_user.id, earlier)
+    buffer.record(user.id, earlier)
+    assert buffer.metrics()["pending"] == 2
+
+    assert await buffer.flush(db_session) == 2
+    result = await db_session.execute(select(User.id, User.last_login_at))
+    stored = dict(result.all())
+    assert stored[verified_user.id] == later
+    assert stored[user.id] == earlier
+    assert buffer.metrics()["pending"] == 0
+
+# Test a successful login with no failed attempts defers only the timestamp
+async def test_login_defers_last_login_at(db_session, verified_user):
+    await login_activity_buffer.flush(db_session)
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234") is not None
+    assert verified_user.id in login_activity_buffer._pending
+    await login_activity_buffer.flush(db_session)
+    result = await db_session.execute(select(User.last_login_at).where(User.id == verified_user.id))
+    assert result.scalar() is not None
+
+# Test a successful login after failures resets the counter synchronously
+async def test_login_after_failures_resets_counter_immediately(db_session, verified_user):
+    await UserService.login_user(db_session, verified_user.email, "wrongpassword")
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234") is not None
+    result = await db_session.execute(select(User.failed_login_attempts).where(User.id == verified_user.id))
+    assert result.scalar() == 0
@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import select
+from app.models.refresh_token_model import RefreshToken
+from app.services.refresh_token_service import RefreshTokenService
+
+pytestmark = pytest.mark.asyncio
+
+# Test that only a digest of the refresh token is stored
+async def test_issue_stores_only_token_digest(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    stored = (await db_session.execute(select(RefreshToken))).scalars().one()
+    assert stored.token_hash != token
+    assert stored.token_hash == RefreshTokenService._digest(token)
+
+# Test rotating a refresh token returns the owner and a new token
+async def test_rotate_returns_new_token(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    email, role, new_token = await RefreshTokenService.rotate(db_session, token)
+    assert email == verified_user.email
+    assert role == verified_user.role
+    assert new_token != token
+    assert await RefreshTokenService.rotate(db_session, new_token) is not None
+
+# Test that reusing a rotated token revokes the whole family
+async def test_reused_token_revokes_family(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    _, _, new_token = await RefreshTokenService.rotate(db_session, token)
+    assert await RefreshTokenService.rotate(db_session, token) is None
+    assert await RefreshTokenService.rotate(db_session, new_token) is None
+
+# Test unknown tokens and tokens of locked accounts are rejected
+async def test_rotate_rejects_unknown_and_locked(db_session, verified_user):
+    assert await RefreshTokenService.rotate(db_session, "not-a-real-token") is None
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    verified_user.is_locked = True
+    await db_session.commit()
+    assert await RefreshTokenService.rotate(db_session, token) is None
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User, UserRole
+from app.services.user_cache import MemoryBackend, UserCache, user_cache
+from app.services.user_service import LoginOutcome, UserService
+
+pytestmark = pytest.mark.asyncio
+
+# Test the second lookup by id or email is served without a query
+async def test_get_row_by_id_and_email_read_through(db_session, user, statement_counter):
+    statement_counter.clear()
+    assert (await UserService.get_row_by_id(db_session, user.id)).email == user.email
+    assert (await UserService.get_row_by_email(db_session, user.email)).id == user.id
+    assert (await UserService.get_row_by_id(db_session, user.id)).nickname == user.nickname
+    assert len(statement_counter) == 1
+    assert user_cache.metrics()["local_hits"] >= 2
+
+# Test writes drop the cached row, so the next lookup sees the change
+async def test_update_invalidates_cached_row(db_session, user):
+    await UserService.get_row_by_id(db_session, user.id)
+    await UserService.update(db_session, user.id, {"email": "moved@example.com"})
+    assert (await UserService.get_row_by_id(db_session, user.id)).email == "moved@example.com"
+    assert await UserService.get_row_by_email(db_session, user.email) is None
+
+async def test_upgrade_invalidates_cached_row(db_session, user, email_service):
+    assert not (await UserService.get_row_by_id(db_session, user.id)).is_professional
+    await UserService.upgrade_to_professional(db_session, user.id, email_service)
+    assert (await UserService.get_row_by_id(db_session, user.id)).is_professional
+
+# Test a read that still sees the row from before a write (a lagging replica) does not cache it again
+async def test_lagging_read_does_not_re_cache_an_invalidated_row(db_session, user):
+    async with AsyncSession(bind=db_session.bind.execution_options(isolation_level="REPEATABLE READ")) as lagging:
+        # the snapshot is taken here, so this session keeps seeing the user as it was before the update
+        await lagging.execute(select(User.id).limit(1))
+        await UserService.update(db_session, user.id, {"first_name": "Renamed"})
+        assert (await UserService.get_row_by_id(lagging, user.id)).first_name == user.first_name
+    assert (await UserService.get_row_by_id(db_session, user.id)).first_name == "Renamed"
+    assert user_cache.metrics()["stores_held"] >= 1
+
+# Test the hold left by an invalidation in one worker reaches the others through the shared tier
+async def test_invalidation_hold_is_shared(db_session, user):
+    row = await UserService.get_row_by_id(db_session, user.id)
+    shared = MemoryBackend()
+    worker_a, worker_b = UserCache(10, 60, shared, hold=5), UserCache(10, 60, shared, hold=5)
+    await worker_a.invalidate(user.id)
+    await worker_b.store(row._asdict())
+    assert await worker_b.get("id", user.id) is None
+    assert worker_b.metrics()["stores_held"] == 1
+
+# Test writes read the user from the database, not from a cached row that is out of date
+async def test_writes_ignore_cached_rows(db_session, user, email_service):
+    await UserService.get_row_by_id(db_session, user.id)
+    await db_session.execute(delete(User).where(User.id == user.id))
+    await db_session.commit()
+    assert await UserService.upgrade_to_professional(db_session, user.id, email_service) is None
+    assert not await UserService.reset_password(db_session, user.id, "NewPassword*1234")
+    assert not await UserService.verify_email_with_token(db_session, user.id, "any-token")
+
+# Test a login that leaves its transaction open drops the cached row only once the caller commits
+async def test_open_login_invalidates_after_commit(db_session, verified_user):
+    await UserService.authenticate(db_session, verified_user.email, "wrongpassword")
+    await UserService.get_row_by_id(db_session, verified_user.id)
+    outcome, _ = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234", commit=False)
+    assert outcome is LoginOutcome.SUCCESS
+    assert await user_cache.get("id", verified_user.id) is not None
+    await db_session.commit()
+    await UserService.invalidate_committed(db_session)
+    assert await user_cache.get("id", verified_user.id) is None
+
+# Test the password hash and verification token are dropped from whatever is stored
+async def test_secrets_are_never_cached(user):
+    cache = UserCache(10, 60, MemoryBackend())
+    await cache.store({"id": user.id, "email": user.email, "hashed_password": user.hashed_password, "verification_token": "secret"})
+    cache.clear()
+    values = await cache.get("id", user.id)
+    assert values == {"id": user.id, "email": user.email}
+
+# Test a shared-tier hit restores the column types and the email index checks the email
+async def test_shared_tier_round_trip(db_session, user):
+    row = await UserService.get_row_by_id(db_session, user.id)
+    shared = MemoryBackend()
+    writer, reader = UserCache(10, 60, shared), UserCache(10, 60, shared)
+    await writer.store(row._asdict())
+    values = await reader.get("email", user.email)
+    assert values["id"] == user.id and values["role"] == UserRole.AUTHENTICATED
+    assert values["created_at"] == row.created_at
+    assert reader.metrics()["shared_hits"] == 1
+    assert await reader.get("email", "someone.else@example.com") is None
+
+# Test an invalidation in one worker drops the entry from the others
+async def test_invalidation_is_broadcast(db_session, user):
+    row = await UserService.get_row_by_id(db_session, user.id)
+    shared = MemoryBackend()
+    worker_a, worker_b = UserCache(10, 60, shared), UserCache(10, 60, shared)
+    worker_b.start()
+    await asyncio.sleep(0)
+    await worker_b.store(row._asdict())
+    await worker_a.invalidate(user.id)
+    assert await worker_b.get("id", user.id) is None
+    assert worker_b.metrics()["broadcasts_received"] == 1
+    await worker_b.stop()
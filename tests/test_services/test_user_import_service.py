@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import select
+from app.models.user_model import User, UserRole
+from app.services.user_import_service import UserImportService
+from app.utils.record_stream import iter_csv_records, iter_ndjson_records
+
+pytestmark = pytest.mark.asyncio
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+async def collect(records):
+    return [record async for record in records]
+
+# Test that lines split across chunks are reassembled and bad lines reported in place
+async def test_ndjson_records_span_chunks():
+    records = await collect(iter_ndjson_records(stream(b'{"email": "a@exa', b'mple.com"}\n\nnot json\n[1]\n{"email": "b@example.com"}')))
+    assert records[0] == (1, {"email": "a@example.com"}, None)
+    assert records[1][0] == 3 and records[1][1] is None
+    assert records[2] == (4, None, "Expected a JSON object")
+    assert records[3] == (5, {"email": "b@example.com"}, None)
+
+async def test_csv_records_use_header_and_blank_cells_become_none():
+    records = await collect(iter_csv_records(stream(b"email,first_name\r\na@example.com,\r\n", b'"b@example.com","Bo"\nonly-one-column,x,y\n')))
+    assert records == [
+        (2, {"email": "a@example.com", "first_name": None}, None),
+        (3, {"email": "b@example.com", "first_name": "Bo"}, None),
+        (4, None, "Expected 2 columns, got 3"),
+    ]
+
+# Test a mixed import reports one result per row in input order
+async def test_import_records_reports_per_row_outcomes(db_session, user):
+    records = stream(
+        (1, {"email": "new1@example.com", "password": "Secure*1234"}, None),
+        (2, {"email": user.email, "password": "Secure*1234"}, None),
+        (3, {"email": "not-an-email", "password": "Secure*1234"}, None),
+        (4, {"email": "new1@example.com", "password": "Secure*1234"}, None),
+        (5, None, "Invalid JSON"),
+        (6, {"email": "new2@example.com", "password": "Secure*1234", "role": "AUTHENTICATED"}, None),
+    )
+    results = await collect(UserImportService.import_records(records, session=db_session, chunk_size=4))
+    assert [result.get("status") for result in results[:-1]] == ["created", "conflict", "invalid", "conflict", "invalid", "created"]
+    assert results[-1] == {"summary": {"created": 2, "conflict": 2, "invalid": 2}}
+
+    result = await db_session.execute(select(User).where(User.email.in_(["new1@example.com", "new2@example.com"])).order_by(User.email))
+    new1, new2 = result.scalars().all()
+    assert new1.role == UserRole.ANONYMOUS and new2.role == UserRole.AUTHENTICATED
+    assert new1.hashed_password != "Secure*1234" and new1.verification_token and new1.nickname
@@ -1,10 +1,16 @@
 from builtins import range
+from uuid import uuid4
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, text, update
 from app.dependencies import get_settings
 from app.models.user_model import User, UserRole
-from app.services.user_service import UserService
+from app.schemas.user_schemas import UserBulkAction, UserResponse
+from app.services import user_service
+from app.services.user_service import CountMode, LoginOutcome, RegistrationOutcome, UniqueFieldTakenError, UserService, user_count_cache
+from app.utils.cursor import PREV, encode_cursor
 from app.utils.nickname_gen import generate_nickname
+from app.utils.password_hashers import password_needs_rehash
+from app.utils.security import hash_password
 
 pytestmark = pytest.mark.asyncio
 
@@ -20,6 +26,57 @@ async def test_create_user_with_valid_data(db_session, email_service):
     assert user is not None
     assert user.email == user_data["email"]
 
+# Test registration is one INSERT and one COMMIT, and only the first user becomes ADMIN
+async def test_register_account_is_a_single_insert(db_session, email_service, round_trips):
+    round_trips.clear()
+    outcome, first = await UserService.register_account(db_session, {"email": "first@example.com", "password": "ValidPassword123!", "role": "ANONYMOUS"}, email_service)
+    assert outcome is RegistrationOutcome.CREATED
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "INSERT", "COMMIT"]
+    assert first.role == UserRole.ADMIN and first.email_verified and first.verification_token is None
+
+    outcome, second = await UserService.register_account(db_session, {"email": "second@example.com", "password": "ValidPassword123!", "role": "ADMIN"}, email_service)
+    assert outcome is RegistrationOutcome.CREATED
+    assert second.role == UserRole.ANONYMOUS and not second.email_verified and second.verification_token
+
+async def test_register_account_reports_taken_email_without_a_lookup(db_session, email_service, user, round_trips):
+    round_trips.clear()
+    outcome, created = await UserService.register_account(db_session, {"email": user.email, "password": "ValidPassword123!", "role": "ANONYMOUS"}, email_service)
+    assert outcome is RegistrationOutcome.EMAIL_TAKEN and created is None
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "INSERT", "ROLLBACK"]
+
+# Test a group of registrations is one INSERT and one COMMIT, with a result per row
+async def test_insert_registrations_fans_out_per_row_outcomes(db_session, user, round_trips):
+    def account(email):
+        return {"email": email, "nickname": None, "hashed_password": hash_password("ValidPassword123!")}
+
+    round_trips.clear()
+    results = await UserService.insert_registrations(db_session, [account("a@example.com"), account(user.email), account("b@example.com"), account("a@example.com")])
+    assert [outcome for outcome, _ in results] == [RegistrationOutcome.CREATED, RegistrationOutcome.EMAIL_TAKEN, RegistrationOutcome.CREATED, RegistrationOutcome.EMAIL_TAKEN]
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "INSERT", "SELECT", "COMMIT"]
+    assert results[0][1].email == "a@example.com" and results[0][1].role == UserRole.ANONYMOUS
+    assert results[2][1].verification_token and not results[2][1].email_verified
+
+# Test only the first row of the very first group becomes ADMIN
+async def test_insert_registrations_makes_one_first_admin(db_session):
+    batch = [{"email": f"first{i}@example.com", "nickname": None, "hashed_password": hash_password("ValidPassword123!")} for i in range(3)]
+    results = await UserService.insert_registrations(db_session, batch)
+    assert [user.role for _, user in results] == [UserRole.ADMIN, UserRole.ANONYMOUS, UserRole.ANONYMOUS]
+    assert results[0][1].email_verified and results[0][1].verification_token is None
+
+# Test a nickname collision costs one more INSERT, not a SELECT per attempt
+async def test_create_retries_taken_nickname(db_session, email_service, user, round_trips, monkeypatch):
+    nicknames = iter([user.nickname, "fresh_nickname_1"])
+    monkeypatch.setattr(user_service, "generate_nickname", lambda: next(nicknames))
+    round_trips.clear()
+    created = await UserService.create(db_session, {"email": "collide@example.com", "password": "ValidPassword123!", "role": "ANONYMOUS"}, email_service)
+    assert created.nickname == "fresh_nickname_1"
+    assert created.id is not None and created.role == UserRole.ANONYMOUS
+    assert [sql.split()[0] for sql in round_trips].count("INSERT") == 2
+
+async def test_create_gives_up_when_no_nickname_is_free(db_session, email_service, user, monkeypatch):
+    monkeypatch.setattr(user_service, "generate_nickname", lambda: user.nickname)
+    assert await UserService.create(db_session, {"email": "stuck@example.com", "password": "ValidPassword123!", "role": "ANONYMOUS"}, email_service) is None
+
 # Test creating a user with invalid data
 async def test_create_user_with_invalid_data(db_session, email_service):
     user_data = {
@@ -73,6 +130,23 @@ async def test_update_user_invalid_data(db_session, user):
     updated_user = await UserService.update(db_session, user.id, {"email": "invalidemail"})
     assert updated_user is None
 
+# Test an update is one UPDATE ... RETURNING, without re-reading the user
+async def test_update_user_returns_row_in_one_statement(db_session, user, round_trips):
+    round_trips.clear()
+    updated_user = await UserService.update(db_session, user.id, {"first_name": "Renamed"})
+    assert UserResponse.model_validate(updated_user).first_name == "Renamed"
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "UPDATE", "COMMIT"]
+
+# Test an update to an email another user has is reported as a conflict, not as a missing user
+async def test_update_user_email_taken(db_session, user, verified_user):
+    with pytest.raises(UniqueFieldTakenError) as raised:
+        await UserService.update(db_session, user.id, {"email": verified_user.email})
+    assert raised.value.field == "email"
+
+# Test updating a user who does not exist
+async def test_update_user_does_not_exist(db_session):
+    assert await UserService.update(db_session, uuid4(), {"first_name": "Nobody"}) is None
+
 # Test deleting a user who exists
 async def test_delete_user_exists(db_session, user):
     deletion_success = await UserService.delete(db_session, user.id)
@@ -84,6 +158,43 @@ async def test_delete_user_does_not_exist(db_session):
     deletion_success = await UserService.delete(db_session, non_existent_user_id)
     assert deletion_success is False
 
+# Test a delete is one DELETE ... RETURNING, without loading the user first
+async def test_delete_user_in_one_statement(db_session, user, round_trips):
+    round_trips.clear()
+    assert await UserService.delete(db_session, user.id) is True
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "DELETE", "COMMIT"]
+    assert await UserService.get_by_id(db_session, user.id) is None
+
+# Test a bulk action on a filter is one UPDATE ... RETURNING for every matching user
+async def test_bulk_set_role_by_filter(db_session, users_with_same_role_50_users, round_trips):
+    round_trips.clear()
+    changed = await UserService.bulk_apply(db_session, UserBulkAction.SET_ROLE, conditions=UserService.filter_conditions(role=UserRole.AUTHENTICATED), role=UserRole.MANAGER)
+    assert len(changed) == 50
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "UPDATE", "COMMIT"]
+    result = await db_session.execute(select(func.count()).select_from(User).where(User.role == UserRole.MANAGER))
+    assert result.scalar() == 50
+
+# Test a bulk delete by ids returns the deleted users in request order
+async def test_bulk_delete_by_ids(db_session, users_with_same_role_50_users):
+    ids = [users_with_same_role_50_users[3].id, uuid4(), users_with_same_role_50_users[1].id]
+    changed = await UserService.bulk_apply(db_session, UserBulkAction.DELETE, ids=ids)
+    assert [row.id for row in changed] == [ids[0], ids[2]]
+    assert await UserService.count(db_session) == 48
+
+# Test a bulk upgrade skips users who are already professional
+async def test_bulk_upgrade_skips_professionals(db_session, verified_user, user):
+    first = await UserService.bulk_apply(db_session, UserBulkAction.UPGRADE, ids=[verified_user.id])
+    assert [row.id for row in first] == [verified_user.id]
+    second = await UserService.bulk_apply(db_session, UserBulkAction.UPGRADE, ids=[verified_user.id, user.id])
+    assert [row.id for row in second] == [user.id]
+
+# Test upgrade emails are sent for each upgraded user, and a failure does not stop the rest
+async def test_send_professional_upgrade_emails(db_session, email_service, verified_user, user):
+    email_service.send_user_email.side_effect = [Exception("SMTP down"), None]
+    changed = await UserService.bulk_apply(db_session, UserBulkAction.UPGRADE, ids=[verified_user.id, user.id])
+    await UserService.send_professional_upgrade_emails(email_service, changed)
+    assert email_service.send_user_email.await_count == 2
+
 # Test listing users with pagination
 async def test_list_users_with_pagination(db_session, users_with_same_role_50_users):
     users_page_1 = await UserService.list_users(db_session, skip=0, limit=10)
@@ -92,6 +203,82 @@ async def test_list_users_with_pagination(db_session, users_with_same_role_50_us
     assert len(users_page_2) == 10
     assert users_page_1[0].id != users_page_2[0].id
 
+# Test walking the user listing forwards and back with keyset cursors
+async def test_list_users_page_with_cursors(db_session, users_with_same_role_50_users):
+    users, has_next, has_prev = await UserService.list_users_page(db_session, limit=20)
+    assert len(users) == 20 and has_next and not has_prev
+    last = users[-1]
+    page_2, has_next, has_prev = await UserService.list_users_page(db_session, limit=20, cursor=encode_cursor(last.created_at, last.id))
+    assert has_next and has_prev
+    assert not {u.id for u in users} & {u.id for u in page_2}
+    first = page_2[0]
+    back, has_next, has_prev = await UserService.list_users_page(db_session, limit=20, cursor=encode_cursor(first.created_at, first.id, PREV))
+    assert [u.id for u in back] == [u.id for u in users]
+    assert has_next and not has_prev
+
+async def test_list_users_page_rejects_malformed_cursor(db_session):
+    with pytest.raises(ValueError):
+        await UserService.list_users_page(db_session, cursor="not-a-cursor")
+
+async def test_get_row_by_id_selects_only_response_columns(db_session, user):
+    row = await UserService.get_row_by_id(db_session, user.id)
+    assert not isinstance(row, User)
+    assert "hashed_password" not in row._fields and "verification_token" not in row._fields
+    assert UserResponse.model_validate(row).email == user.email
+    assert await UserService.get_row_by_id(db_session, uuid4()) is None
+
+async def test_stream_rows_applies_filters(db_session, user, verified_user, locked_user):
+    rows = [row async for row in UserService.stream_rows(db_session, ["email", "is_locked"], is_locked=True)]
+    assert rows == [(locked_user.email, True)]
+    rows = [row async for row in UserService.stream_rows(db_session, ["id"], email_verified=True)]
+    assert verified_user.id in {row.id for row in rows} and user.id not in {row.id for row in rows}
+
+async def test_batch_lookup_keeps_request_order_and_reports_missing(db_session, user, verified_user, statement_counter):
+    missing_id = uuid4()
+    statement_counter.clear()
+    found, not_found = await UserService.batch_lookup(
+        db_session, ids=[verified_user.id, missing_id, user.id], emails=["nobody@example.com", user.email]
+    )
+    assert len(statement_counter) == 1
+    assert [row.id for row in found] == [verified_user.id, user.id]
+    assert not_found == [str(missing_id), "nobody@example.com"]
+
+async def test_search_matches_names_and_applies_filters(db_session, user, verified_user, locked_user):
+    conditions = UserService.search_conditions(verified_user.nickname)
+    users, _, _ = await UserService.list_users_page(db_session, 10, conditions=conditions)
+    assert [u.id for u in users] == [verified_user.id]
+    conditions = UserService.search_conditions(user.email.upper()[:5], is_locked=False)
+    users, _, _ = await UserService.list_users_page(db_session, 10, conditions=conditions)
+    assert user.id in {u.id for u in users} and locked_user.id not in {u.id for u in users}
+
+async def test_search_escapes_like_wildcards(db_session, user):
+    users, _, _ = await UserService.list_users_page(db_session, 10, conditions=UserService.search_conditions("%%%"))
+    assert users == []
+
+async def test_lookups_do_not_commit(db_session, user, round_trips):
+    round_trips.clear()
+    assert (await UserService.get_by_email(db_session, user.email)).id == user.id
+    assert await UserService.get_by_nickname(db_session, "no-such-nickname") is None
+    assert [sql.split()[0] for sql in round_trips] == ["BEGIN", "SELECT", "SELECT"]
+
+async def test_count_modes(db_session, users_with_same_role_50_users, monkeypatch):
+    assert await UserService.count(db_session) == 50
+    # a 50 row table is below the estimate threshold, so the estimate is an exact count
+    assert await UserService.count(db_session, CountMode.ESTIMATED) == 50
+    monkeypatch.setattr(user_service.settings, "user_count_estimate_min_rows", 0)
+    await db_session.execute(text("ANALYZE users"))
+    assert await UserService.count(db_session, CountMode.ESTIMATED) == 50
+
+async def test_cached_count_is_invalidated_by_delete(db_session, users_with_same_role_50_users):
+    user_count_cache.clear()
+    assert await UserService.count(db_session, CountMode.CACHED) == 50
+    for _ in range(2):
+        db_session.add(User(nickname=uuid4().hex[:20], email=f"{uuid4()}@example.com", hashed_password="x", role=UserRole.AUTHENTICATED))
+    await db_session.commit()
+    assert await UserService.count(db_session, CountMode.CACHED) == 50
+    assert await UserService.delete(db_session, users_with_same_role_50_users[0].id)
+    assert await UserService.count(db_session, CountMode.CACHED) == 51
+
 # Test registering a user with valid data
 async def test_register_user_with_valid_data(db_session, email_service):
     user_data = {
@@ -122,6 +309,15 @@ async def test_login_user_successful(db_session, verified_user):
     logged_in_user = await UserService.login_user(db_session, user_data["email"], user_data["password"])
     assert logged_in_user is not None
 
+# Test that a login with an outdated hash cost transparently rehashes the password
+async def test_login_user_rehashes_outdated_hash(db_session, verified_user):
+    verified_user.hashed_password = hash_password("MySuperPassword$1234", rounds=4)
+    await db_session.commit()
+    logged_in_user = await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234")
+    assert logged_in_user is not None
+    assert not password_needs_rehash(logged_in_user.hashed_password)
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234") is not None
+
 # Test user login with incorrect email
 async def test_login_user_incorrect_email(db_session):
     user = await UserService.login_user(db_session, "nonexistentuser@noway.com", "Password123!")
@@ -141,6 +337,56 @@ async def test_account_lock_after_failed_logins(db_session, verified_user):
     is_locked = await UserService.is_account_locked(db_session, verified_user.email)
     assert is_locked, "The account should be locked after the maximum number of failed login attempts."
 
+# Test failed logins are counted in the database, not from the possibly stale in-memory value
+async def test_failed_login_increments_are_atomic(db_session, verified_user):
+    # Another worker has already recorded a failed attempt that this session has not seen
+    await db_session.execute(update(User).where(User.id == verified_user.id).values(failed_login_attempts=1).execution_options(synchronize_session=False))
+    await db_session.commit()
+    assert verified_user.failed_login_attempts == 0
+
+    outcome, user = await UserService.authenticate(db_session, verified_user.email, "wrongpassword")
+    assert outcome is LoginOutcome.INVALID_CREDENTIALS
+    assert user.failed_login_attempts == 2
+    assert not user.is_locked
+
+# Test a locked account is reported as locked even with the correct password
+async def test_authenticate_locked_account(db_session, locked_user):
+    outcome, _ = await UserService.authenticate(db_session, locked_user.email, "MySuperPassword$1234")
+    assert outcome is LoginOutcome.LOCKED
+
+class VerifyDuringWrite:
+    """Hashing service stand-in whose verify commits `statement` from another connection first."""
+
+    def __init__(self, engine, statement, verified):
+        self.engine, self.statement, self.verified = engine, statement, verified
+
+    async def verify(self, password, hashed_password, priority):
+        async with self.engine.begin() as connection:
+            await connection.execute(self.statement)
+        return self.verified
+
+# Test a lockout committed while the password was verified stops the login and keeps the counter;
+# without earlier failures the login takes the write-behind path, with one the synchronous UPDATE
+@pytest.mark.parametrize("failed_attempts", [0, 1])
+async def test_login_locked_during_verification(db_session, verified_user, monkeypatch, failed_attempts):
+    max_login_attempts = get_settings().max_login_attempts
+    verified_user.failed_login_attempts = failed_attempts
+    await db_session.commit()
+    lock = update(User).where(User.id == verified_user.id).values(is_locked=True, failed_login_attempts=max_login_attempts)
+    monkeypatch.setattr(user_service.settings, "login_write_behind", True)
+    monkeypatch.setattr(user_service, "get_hashing_service", lambda: VerifyDuringWrite(db_session.bind, lock, True))
+
+    outcome, _ = await UserService.authenticate(db_session, verified_user.email, "MySuperPassword$1234")
+    assert outcome is LoginOutcome.LOCKED
+    await db_session.commit()
+    assert await db_session.scalar(select(User.failed_login_attempts).where(User.id == verified_user.id)) == max_login_attempts
+
+# Test a failed login for a user deleted while the password was verified is just a failed login
+async def test_failed_login_of_deleted_user(db_session, verified_user, monkeypatch):
+    remove = delete(User).where(User.id == verified_user.id)
+    monkeypatch.setattr(user_service, "get_hashing_service", lambda: VerifyDuringWrite(db_session.bind, remove, False))
+    assert await UserService.authenticate(db_session, verified_user.email, "wrongpassword") == (LoginOutcome.INVALID_CREDENTIALS, None)
+
 # Test resetting a user's password
 async def test_reset_password(db_session, user):
     new_password = "NewPassword123!"